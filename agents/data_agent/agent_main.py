@@ -20,7 +20,7 @@ from dotenv import load_dotenv
 # --- Add root directory to sys.path ---
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
-from authentication_provider import get_http_client_based_on_authentication
+from authentication_provider import LazyHttpClient
 from .agent_executor import DataAgentExecutor
 
 load_dotenv()
@@ -66,7 +66,8 @@ def main(host, port):
         )
 
         # --- HTTP client + push config ---
-        http_client = get_http_client_based_on_authentication(httpx.AsyncClient)
+        # built on first push notification, not before the server starts
+        http_client = LazyHttpClient(httpx.AsyncClient)
         push_config = InMemoryPushNotificationConfigStore()
         push_sender = BasePushNotificationSender(http_client, config_store=push_config)
 
@@ -3,7 +3,6 @@ import io
 import json
 import base64
 import httpx
-import pandas as pd
 import logging
 from dotenv import load_dotenv
 from a2a.types import Message, Part, Role
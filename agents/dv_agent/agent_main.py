@@ -20,7 +20,7 @@ from a2a.types import AgentCapabilities, AgentCard, AgentSkill
 # add project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
-from authentication_provider import get_http_client_based_on_authentication
+from authentication_provider import LazyHttpClient
 from .agent_executor import DVAgentExecutor
 
 load_dotenv()
@@ -55,7 +55,8 @@ def main(host, port):
             skills=[skill],
         )
 
-        http_client = get_http_client_based_on_authentication(httpx.AsyncClient)
+        # built on first push notification, not before the server starts
+        http_client = LazyHttpClient(httpx.AsyncClient)
         push_config = InMemoryPushNotificationConfigStore()
         push_sender = BasePushNotificationSender(http_client, config_store=push_config)
 
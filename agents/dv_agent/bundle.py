@@ -0,0 +1,256 @@
+# agents/dv_agent/bundle.py
+"""
+Bundle mode helpers: turn a scraped HTML resource into a section of one
+self-contained result page.
+
+For each resource:
+- scripts, frames, embedded objects and event handlers are removed, and
+  so are javascript:, vbscript: and data: URLs in every URL attribute
+  (data:image/ stays allowed for images);
+- relative URLs (src, href, srcset entries, ...) are rewritten to the
+  resource's /static URL;
+- the page's <style> blocks and local stylesheets are read, minified and
+  scoped under SCOPE, so they style only the resource sections and not
+  the page around them.
+
+The result page inlines each distinct stylesheet once. Bootstrap,
+font-awesome, etc. are identical across the scraped pages, so they are
+shared by the hash of the prepared CSS: copies whose relative url()s
+resolve to different directories stay separate.
+"""
+import os
+import re
+import hashlib
+import posixpath
+import threading
+from collections import OrderedDict
+
+from bs4 import BeautifulSoup
+
+SCOPE = ".dv-resource"
+STATIC_PREFIX = "/static/resource/"
+
+REMOVED_TAGS = ["script", "noscript", "iframe", "frame", "frameset", "object", "embed", "applet",
+                "base", "meta", "link", "style", "title"]
+URL_ATTRS = ["src", "href", "xlink:href", "action", "formaction", "poster", "background", "cite",
+             "longdesc", "data", "codebase", "ping", "lowsrc", "dynsrc"]
+SRCSET_ATTRS = ["srcset", "imagesrcset"]
+IMAGE_ATTRS = ["src", "poster", "lowsrc", "dynsrc", "srcset", "imagesrcset"]
+# SVG <set>/<animate> can assign a script URL to href through these
+ANIMATION_ATTRS = ["to", "from", "values", "by"]
+ABSOLUTE_URL = re.compile(r"^(?:[a-z][a-z0-9+.-]*:|//|/|#)", re.IGNORECASE)
+_UNSAFE_SCHEMES = ("javascript:", "vbscript:", "data:")
+_IGNORED_IN_URL = re.compile(r"[\x00-\x20]+")  # browsers skip these while reading the scheme
+
+_CSS_TOKEN = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)|(;\s*})|(\s+)""", re.DOTALL)
+_CSS_URL = re.compile(r"""url\(\s*(["']?)([^"')]*)\1\s*\)""")
+_ROOT_SELECTOR = re.compile(r"^(?:html|:root|body)\b\s*(?:body\b)?\s*")
+_NO_SPACE_AROUND = set("{};,>")
+
+# (source hash, base url) -> (prepared hash, prepared css), least recently used first
+_prepared = OrderedDict()
+_prepared_lock = threading.Lock()  # extract_resource runs in worker threads
+PREPARED_MAX = int(os.getenv("DV_BUNDLE_CSS_CACHE", 512))
+
+
+# --------------------------------------------------------------------
+# CSS
+# --------------------------------------------------------------------
+def minify_css(css: str) -> str:
+    """Drop comments and redundant whitespace; quoted strings are left alone."""
+    def replace(m):
+        if m.group(1):
+            return m.group(1)
+        if m.group(2):
+            return ""
+        if m.group(3):
+            return "}"
+        before = m.string[m.start() - 1] if m.start() else "{"
+        after = m.string[m.end()] if m.end() < len(m.string) else "}"
+        return "" if before in _NO_SPACE_AROUND or after in _NO_SPACE_AROUND else " "
+    return _CSS_TOKEN.sub(replace, css).strip()
+
+
+def rewrite_css_urls(css: str, base_url: str) -> str:
+    """Resolve relative url(...) references against the stylesheet's own URL."""
+    def replace(m):
+        url = m.group(2).strip()
+        if not url or ABSOLUTE_URL.match(url):
+            return m.group(0)
+        return f'url("{posixpath.normpath(posixpath.join(base_url, url))}")'
+    return _CSS_URL.sub(replace, css)
+
+
+def _split_top_level(text: str, sep: str) -> list:
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(text):
+        if ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        elif ch == sep and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _scope_selector(selector: str, scope: str) -> str:
+    selector = selector.strip()
+    m = _ROOT_SELECTOR.match(selector)
+    if m:
+        # html/body/:root become the section itself
+        rest = selector[m.end():]
+        return scope + (rest if not rest or rest[0] in ".#:[" else " " + rest)
+    return f"{scope} {selector}"
+
+
+def _block_end(css: str, start: int) -> int:
+    """Index just past the '}' closing the block whose '{' is at start - 1."""
+    depth, i = 1, start
+    while i < len(css) and depth:
+        ch = css[i]
+        if ch in "\"'":
+            i = css.find(ch, i + 1)
+            if i == -1:
+                return len(css)
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+        i += 1
+    return i
+
+
+def scope_css(css: str, scope: str = SCOPE) -> str:
+    """
+    Prefix every selector with scope. @media/@supports blocks are scoped
+    recursively, other at-rules (@font-face, @keyframes, ...) are kept
+    as they are, and @import/@charset statements are dropped.
+    """
+    out, i = [], 0
+    while i < len(css):
+        brace, semi = css.find("{", i), css.find(";", i)
+        if brace == -1:
+            break
+        if semi != -1 and semi < brace and css[i:semi].lstrip().startswith("@"):
+            i = semi + 1  # @import / @charset / @namespace
+            continue
+        prelude = css[i:brace].strip()
+        end = _block_end(css, brace + 1)
+        body = css[brace + 1:end - 1]
+        if prelude.startswith(("@media", "@supports", "@layer")):
+            out.append(f"{prelude}{{{scope_css(body, scope)}}}")
+        elif prelude.startswith("@"):
+            out.append(f"{prelude}{{{body}}}")
+        elif prelude:
+            selectors = ",".join(_scope_selector(s, scope) for s in _split_top_level(prelude, ","))
+            out.append(f"{selectors}{{{body}}}")
+        i = end
+    return "".join(out)
+
+
+def prepare_css(css: str, base_url: str) -> tuple:
+    """
+    (hash of the result, minified + scoped CSS). The page keeps one copy
+    per hash; the same sheet at the same base URL is processed only once.
+    """
+    key = (hashlib.sha256(css.encode("utf-8", "replace")).hexdigest(), base_url)
+    with _prepared_lock:
+        if key in _prepared:
+            _prepared.move_to_end(key)
+            return _prepared[key]
+    prepared = scope_css(minify_css(rewrite_css_urls(css, base_url)))
+    result = (hashlib.sha256(prepared.encode("utf-8", "replace")).hexdigest()[:16], prepared)
+    if PREPARED_MAX > 0:
+        with _prepared_lock:
+            _prepared[key] = result
+            while len(_prepared) > PREPARED_MAX:
+                _prepared.popitem(last=False)
+    return result
+
+
+# --------------------------------------------------------------------
+# HTML
+# --------------------------------------------------------------------
+def _local_path(root: str, href: str):
+    """Filesystem path of a relative href inside root, or None."""
+    if not href or ABSOLUTE_URL.match(href):
+        return None
+    path = os.path.normpath(os.path.join(root, href.split("?")[0].split("#")[0]))
+    if os.path.commonpath([os.path.abspath(path), os.path.abspath(root)]) != os.path.abspath(root):
+        return None
+    return path if os.path.isfile(path) else None
+
+
+def _unsafe_url(value: str, image: bool = False) -> bool:
+    url = _IGNORED_IN_URL.sub("", value).lower()
+    if image and url.startswith("data:image/"):
+        return False
+    return url.startswith(_UNSAFE_SCHEMES)
+
+
+def _static_url(url: str) -> str:
+    if not url or ABSOLUTE_URL.match(url):
+        return url
+    return posixpath.normpath(posixpath.join(STATIC_PREFIX, url))
+
+
+def _rewrite_srcset(value: str) -> str:
+    """Rewrite each "url [descriptor]" entry like src; unsafe entries are dropped."""
+    entries = []
+    for entry in value.split(","):
+        parts = entry.split(None, 1)
+        if not parts or _unsafe_url(parts[0], image=True):
+            continue
+        entries.append(" ".join([_static_url(parts[0])] + parts[1:]))
+    return ", ".join(entries)
+
+
+def extract_resource(root: str, name: str) -> tuple:
+    """
+    (sanitized body HTML, [(css hash, scoped css), ...]) for the HTML file
+    root/name. Only local stylesheets are inlined; remote ones are dropped.
+    """
+    with open(os.path.join(root, name), "r", encoding="utf-8", errors="replace") as f:
+        soup = BeautifulSoup(f.read(), "html.parser")
+
+    styles = []
+    for tag in soup.find_all(["link", "style"]):
+        if tag.name == "style":
+            styles.append(prepare_css(tag.get_text(), STATIC_PREFIX))
+        elif "stylesheet" in (tag.get("rel") or []):
+            path = _local_path(root, tag.get("href"))
+            if path:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    href_dir = posixpath.dirname(os.path.relpath(path, root).replace(os.sep, "/"))
+                    styles.append(prepare_css(f.read(), posixpath.join(STATIC_PREFIX, href_dir) + "/"))
+
+    for tag in soup.find_all(REMOVED_TAGS):
+        tag.decompose()
+    for tag in soup.find_all(True):
+        for attr in list(tag.attrs):
+            value, key = tag.attrs[attr], attr.lower()
+            if key.startswith("on"):
+                del tag.attrs[attr]
+            elif not isinstance(value, str):
+                continue
+            elif key in SRCSET_ATTRS:
+                value = _rewrite_srcset(value)
+                if value:
+                    tag.attrs[attr] = value
+                else:
+                    del tag.attrs[attr]
+            elif key in URL_ATTRS:
+                value = value.strip()
+                if _unsafe_url(value, image=key in IMAGE_ATTRS):
+                    del tag.attrs[attr]
+                else:
+                    tag.attrs[attr] = _static_url(value)
+            elif key in ANIMATION_ATTRS and any(_unsafe_url(v) for v in value.split(";")):
+                del tag.attrs[attr]
+    for img in soup.find_all("img"):
+        img["loading"] = "lazy"
+
+    body = soup.body or soup
+    return body.decode_contents(), styles
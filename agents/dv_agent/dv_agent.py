@@ -1,5 +1,7 @@
 # agents/dv_agent/dv_agent.py
 import os
+import html
+import asyncio
 import logging
 import httpx
 from dotenv import load_dotenv
@@ -8,6 +10,9 @@ from fastapi import APIRouter, Body, HTTPException
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 
+from .bundle import SCOPE, extract_resource
+from .manifest import shared_manifest, Resource
+
 
 load_dotenv()
 DATA_OUTPUT_DIR = os.getenv("DATA_OUTPUT_DIR")
@@ -18,6 +23,27 @@ if not DATA_OUTPUT_DIR:
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
+PAGE_HEAD = """
+            <html>
+
+            <body>
+                <h1>Visualization Results</h1>
+                """
+# bundle: one page, resource content inline with shared CSS; iframe: one frame per resource
+ASSEMBLY_MODE = os.getenv("DV_ASSEMBLY_MODE", "iframe")
+BUNDLE_HEAD = """
+            <html>
+            <head>
+            <style>{css}</style>
+            </head>
+            <body>
+                <h1>Visualization Results</h1>
+                """
+PAGE_TAIL = """
+            </body>
+            </html>
+            """
+
 class DVAgent:
     """
     DV Agent: orchestrates visualization requests to MCP_DV.
@@ -27,6 +53,13 @@ class DVAgent:
         #self.mcp_port = os.getenv("DV_MCP_PORT", "10030")
         # self.mcp_url = f"http://localhost:{self.mcp_port}"
         logger.info("-------------Initilizing Critic-------------")
+        # directory listing kept current by change notifications (or polling);
+        # shared by all instances, so each new agent doesn't add a watcher thread
+        self.manifest = shared_manifest(DATA_OUTPUT_DIR)
+        # (name, file identity, priority, mode) -> rendered card HTML
+        self._cards = {}
+        # (name, file identity) -> (sanitized body, [(css hash, scoped css)]) for bundle mode
+        self._bundles = {}
 
     async def invoke_bkp(self, query: str, context_id: str, params: dict = None):
         """
@@ -49,7 +82,8 @@ class DVAgent:
     async def invoke(self, query: str, context_id: str, params: dict = None):
         """
         query: textual request/intent
-        params: optional dict such as:
+        params: optional dict (the A2A message metadata) such as:
+            { 'methods': 'ug_curriculum,academic_calendar' } or
             { 'files': ['output.html', 'graph.pdf'] }
         """
         try:
@@ -59,108 +93,138 @@ class DVAgent:
             logger.exception("DVAgent failed")
             raise
 
-    def render_html_card(self,title, content):
+    def render_html_card(self, title, content, priority=None):
+        priority_attr = f' data-priority="{priority}"' if priority is not None else ""
         return f"""
-        <section class="dv-card">
+        <section class="dv-card"{priority_attr}>
             <h2>{title}</h2>
             {content}
         </section>
         """
 
 
-    def render_iframe(self, resource_url):
+    def render_iframe(self, resource_url, loading="eager"):
+        fetch = ' fetchpriority="high"' if loading == "eager" else ""
         return f"""
-        <iframe src="{resource_url}" class="dv-iframe"></iframe>
+        <iframe src="{resource_url}" class="dv-iframe" loading="{loading}"{fetch}></iframe>
         """
 
 
-    def render_pdf(self,resource_url):
+    def render_pdf(self, resource_url, loading="eager"):
+        if loading == "lazy":
+            # <embed> can't be lazy-loaded; an iframe shows the PDF the same way
+            return f"""
+        <iframe src="{resource_url}" class="dv-pdf" loading="lazy"></iframe>
+        """
         return f"""
         <embed src="{resource_url}" type="application/pdf" class="dv-pdf" />
         """
-    
+
+    def select_resources(self, resources: dict, payload: dict):
+        """
+        (selected resources, requested names that matched nothing).
+        payload["files"] names files; payload["methods"] (list or comma-separated,
+        as routed by the ML agent) matches file stems, e.g. "academic_calendar"
+        -> academic_calendar.pdf. With neither, every resource is selected.
+        """
+        files = payload.get("files")
+        methods = payload.get("methods")
+        if isinstance(methods, str):
+            methods = [m.strip() for m in methods.split(",") if m.strip()]
+        if not files and not methods:
+            return list(resources.values()), []
+
+        selected, missing = [], []
+        for name in files or []:
+            if name in resources:
+                selected.append(resources[name])
+            else:
+                missing.append(name)
+        by_stem = {}
+        for r in resources.values():
+            by_stem.setdefault(os.path.splitext(r.name)[0], []).append(r)
+        for method in methods or []:
+            if method in by_stem:
+                selected.extend(r for r in by_stem[method] if r not in selected)
+            else:
+                missing.append(method)
+        return selected, missing
+
+    def render_resource(self, resource: Resource, priority: int, mode: str = "iframe") -> str:
+        """
+        Card HTML for one resource, cached against the file's identity. The
+        first card (priority 1) loads eagerly, the rest lazily. In bundle
+        mode HTML resources are inlined from self._bundles.
+        """
+        key = (resource.name, resource.identity, priority, mode)
+        card = self._cards.get(key)
+        if card is None:
+            resource_url = f"/static/resource/{resource.name}"
+            loading = "eager" if priority == 1 else "lazy"
+            if resource.kind == "html" and mode == "bundle":
+                body, _ = self._bundles[(resource.name, resource.identity)]
+                card = self.render_html_card(f"HTML Resource: {resource.name}",
+                                             f'<div class="{SCOPE[1:]}">{body}</div>', priority)
+            elif resource.kind == "html":
+                card = self.render_html_card(f"HTML Resource: {resource.name}",
+                                             self.render_iframe(resource_url, loading), priority)
+            else:
+                card = self.render_html_card(f"PDF Resource: {resource.name}",
+                                             self.render_pdf(resource_url, loading), priority)
+            self._cards[key] = card
+        return card
+
+    async def load_bundles(self, resources: list):
+        """Parse and sanitize the HTML resources not yet in self._bundles, off the event loop."""
+        pending = [r for r in resources if r.kind == "html" and (r.name, r.identity) not in self._bundles]
+        parsed = await asyncio.gather(*(asyncio.to_thread(extract_resource, DATA_OUTPUT_DIR, r.name) for r in pending))
+        for r, bundle in zip(pending, parsed):
+            self._bundles[(r.name, r.identity)] = bundle
+
+    def bundle_css(self, resources: list) -> str:
+        """Each distinct stylesheet of the resources once, in first-use order."""
+        sheets = {}
+        for r in resources:
+            if r.kind == "html":
+                for digest, css in self._bundles[(r.name, r.identity)][1]:
+                    sheets.setdefault(digest, css)
+        return f"{SCOPE}{{display:flow-root}}" + "".join(sheets.values())
+
     async def combine_results(self, payload: dict = None):
-       
+        """
+        One page with a card per HTML/PDF resource in DATA_OUTPUT_DIR, limited
+        to the routed methods / files in payload when given. payload["mode"]
+        (default DV_ASSEMBLY_MODE) picks iframes or one bundled document.
+        """
         if payload is None:
             payload = {}
 
-        try:  
-
-            file_names = os.listdir(DATA_OUTPUT_DIR)
-            logger.info(f"File Names in the folder {DATA_OUTPUT_DIR}")
-            logger.info(file_names)
-            #if "files" not in payload:
-             #   raise HTTPException(status_code=400, detail="Payload must include 'files'")
-
-            #file_names = payload["files"]
-            combined_html_parts = []
-
-
-            for name in file_names:
-                file_path = os.path.join(DATA_OUTPUT_DIR, name)
-
-                if not os.path.exists(file_path):
-                    combined_html_parts.append(
-                        f"<div style='color:red'>⚠ File not found: {file_path}</div>"
-                    )
-                    continue
-
-                ext = os.path.splitext(name)[1].lower()
-
-                resource_url = f"/static/resource/{name}"
-                # ---------------------------
-                # HTML FILE
-                # ---------------------------
-
-                if ext in [".html", ".htm"]:
-                    content = self.render_iframe(resource_url)
-                    combined_html_parts.append( self.render_html_card(f"HTML Resource: {name}", content))
-                    # Instead of reading file content, serve as iframe
-                    # resource_url = f"/static/resource/{name}"  # Flask route you will create
-
-
-                    # wrapped = f"""
-                    # <section style="margin-bottom:30px; padding:20px; border:1px solid #ccc; border-radius:8px;">
-                    #     <h2>HTML Resource: {name}</h2>
-                    #     <iframe src="{resource_url}" 
-                    #             style="width:100%; height:600px; border:none;">
-                    #     </iframe>
-                    # </section>
-                    # """
-                    # combined_html_parts.append(wrapped)
-                # ---------------------------
-                # PDF FILE
-                # ---------------------------
-                elif ext == ".pdf":
-                    content = self.render_pdf(resource_url)
-                    combined_html_parts.append(self.render_html_card(f"PDF Resource: {name}", content))
-                    # wrapped = f"""
-                    # <section style="margin-bottom:30px; padding:20px; border:1px solid #ccc; border-radius:8px;">
-                    #     <h2>PDF Resource: {name}</h2>
-                    #     <embed src="/static/resource/{name}" type="application/pdf" width="100%" height="800px" />
-                    # </section>
-                    # """
-                    # combined_html_parts.append(wrapped)
-
-                # else:
-                #     combined_html_parts.append(
-                #         f"<p style='color:orange'>Unsupported file type: {name}</p>"
-                #     )
-
-            final_page = f"""
-            <html>
-
-            <body>
-                <h1>Visualization Results</h1>
-                {''.join(combined_html_parts)}
-            </body>
-            </html>
-            """
-            logger.info(f"Combined files : {final_page}")
-            #return HTMLResponse(content=final_page, status_code=200)
+        try:
+            mode = payload.get("mode") or ASSEMBLY_MODE
+            if mode not in ("iframe", "bundle"):
+                raise ValueError(f"Unknown assembly mode '{mode}'")
+            resources = self.manifest.snapshot()
+            selected, missing = self.select_resources(resources, payload)
+            logger.info(f"Resources in {DATA_OUTPUT_DIR}: {list(resources)}; "
+                        f"selected: {[r.name for r in selected]}; missing: {missing}")
+
+            live = {(r.name, r.identity) for r in resources.values()}
+            for key in [k for k in self._cards if k[:2] not in live]:
+                del self._cards[key]  # file was removed or changed
+            for key in [k for k in self._bundles if k not in live]:
+                del self._bundles[key]
+
+            head = PAGE_HEAD
+            if mode == "bundle":
+                await self.load_bundles(selected)
+                head = BUNDLE_HEAD.format(css=self.bundle_css(selected))
+
+            parts = [f"<div style='color:red'>⚠ Resource not found: {html.escape(name)}</div>" for name in missing]
+            parts += [self.render_resource(r, priority, mode) for priority, r in enumerate(selected, start=1)]
+            final_page = head + "".join(parts) + PAGE_TAIL
+            logger.info(f"Combined {len(selected)} resources ({mode}) into {len(final_page)} characters")
             return final_page
-                
 
         except Exception as e:
             logger.exception("Error in combine_results()")
-            raise
\ No newline at end of file
+            raise
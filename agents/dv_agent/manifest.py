@@ -0,0 +1,152 @@
+# agents/dv_agent/manifest.py
+"""
+In-memory manifest of the resources in DATA_OUTPUT_DIR.
+
+The manifest lists the top-level HTML and PDF files with their identity
+(inode, size, mtime). The directory is rescanned only after it changed:
+- with watchdog installed, filesystem notifications mark the manifest dirty;
+- otherwise each snapshot stats the directory (one syscall) and a full
+  rescan runs when its mtime moved or POLL_S seconds have passed, which
+  also catches files rewritten in place.
+
+shared_manifest() keeps one manifest (and one observer thread) per
+directory for the whole process; the observers are stopped at exit.
+"""
+import os
+import time
+import atexit
+import logging
+import threading
+from dataclasses import dataclass
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # polling fallback
+    FileSystemEventHandler, Observer = object, None
+
+logger = logging.getLogger(__name__)
+
+POLL_S = float(os.getenv("DV_MANIFEST_POLL_S", 2))
+RESOURCE_EXTENSIONS = {".html": "html", ".htm": "html", ".pdf": "pdf"}
+
+
+@dataclass(frozen=True)
+class Resource:
+    name: str
+    kind: str        # "html" | "pdf"
+    path: str
+    identity: tuple  # (inode, size, mtime_ns): changes whenever the file does
+
+
+class _DirtyOnChange(FileSystemEventHandler):
+    def __init__(self, manifest):
+        self.manifest = manifest
+
+    def on_any_event(self, event):
+        self.manifest.mark_dirty()
+
+
+class ResourceManifest:
+    def __init__(self, root: str, poll_s: float = POLL_S):
+        self.root = root
+        self.poll_s = poll_s
+        self._resources = {}
+        self._dirty = True
+        self._dir_mtime = None
+        self._scanned_at = 0.0
+        self._observer = None
+        self._lock = threading.Lock()
+        self.stats = {"scans": 0, "snapshots": 0}
+
+    @property
+    def watching(self) -> bool:
+        return self._observer is not None
+
+    def start(self):
+        """Start filesystem notifications if watchdog is available."""
+        if Observer is None or self._observer is not None or not os.path.isdir(self.root):
+            return
+        observer = Observer()
+        observer.schedule(_DirtyOnChange(self), self.root, recursive=False)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        logger.info(f"Watching {self.root} for resource changes")
+
+    def stop(self):
+        """Stop and join the observer thread; a later snapshot() starts a new one."""
+        with self._lock:
+            observer, self._observer = self._observer, None
+            self._dirty = True  # changes while unwatched are missed
+        if observer is not None:
+            observer.stop()
+            observer.join(timeout=5)
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def _stale(self) -> bool:
+        if self._dirty:
+            return True
+        if self.watching:
+            return False
+        try:
+            dir_mtime = os.stat(self.root).st_mtime_ns
+        except FileNotFoundError:
+            dir_mtime = None
+        return dir_mtime != self._dir_mtime or time.monotonic() - self._scanned_at > self.poll_s
+
+    def _scan(self):
+        # clear the flag first: an event during the scan triggers another one
+        self._dirty = False
+        resources = {}
+        try:
+            self._dir_mtime = os.stat(self.root).st_mtime_ns
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            self._dir_mtime, entries = None, []
+        for entry in entries:
+            kind = RESOURCE_EXTENSIONS.get(os.path.splitext(entry.name)[1].lower())
+            if kind is None:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except FileNotFoundError:
+                continue  # deleted while scanning
+            resources[entry.name] = Resource(entry.name, kind, entry.path, (st.st_ino, st.st_size, st.st_mtime_ns))
+        self._resources = dict(sorted(resources.items()))
+        self._scanned_at = time.monotonic()
+        self.stats["scans"] += 1
+
+    def snapshot(self) -> dict:
+        """{name: Resource} for the current directory contents, sorted by name."""
+        with self._lock:
+            self.start()
+            if self._stale():
+                self._scan()
+            self.stats["snapshots"] += 1
+            return self._resources
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_manifest(root: str) -> ResourceManifest:
+    """The process-wide manifest for root; every DVAgent instance reuses it."""
+    key = os.path.abspath(root)
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = ResourceManifest(root)
+        return _shared[key]
+
+
+@atexit.register
+def stop_all():
+    with _shared_lock:
+        manifests = list(_shared.values())
+    for manifest in manifests:
+        manifest.stop()
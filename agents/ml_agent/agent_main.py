@@ -19,7 +19,7 @@ from a2a.types import AgentCapabilities, AgentCard, AgentSkill
 # --- Add root directory to sys.path ---
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
-from authentication_provider import get_http_client_based_on_authentication
+from authentication_provider import LazyHttpClient
 from .agent_executor import MLAgentExecutor  # <-- Make sure this exists
 
 load_dotenv()
@@ -65,7 +65,8 @@ def main(host, port):
         )
 
         # --- HTTP client + push config ---
-        http_client = get_http_client_based_on_authentication(httpx.AsyncClient)
+        # built on first push notification, not before the server starts
+        http_client = LazyHttpClient(httpx.AsyncClient)
         #httpx_client = httpx.AsyncClient
         push_config = InMemoryPushNotificationConfigStore()
         push_sender = BasePushNotificationSender(http_client, config_store=push_config)
@@ -1,27 +1,97 @@
 import os
+import time
+import asyncio
 import logging
 import httpx
 from dotenv import load_dotenv
-from authentication_provider import get_http_client_based_on_authentication, get_http_client_based_on_authentication, get_default_headers_based_on_authentication
+from authentication_provider import get_http_client_based_on_authentication, aget_default_headers_based_on_authentication
 #from .agent_executor import MLAgentExecutor  # <-- Make sure this exists
-from langchain_core.utils.function_calling import convert_to_openai_tool
-from langchain_openai import ChatOpenAI
-from openai import AsyncOpenAI
 
 import json
-from openai import OpenAI
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
-MODEL_NAME = "gpt-4o-mini"
+MODEL_NAME = os.getenv("LLM_MODEL", "gpt-4o-mini")
 API_SLEEP = 0.5
 
-with open('data/api_key.txt') as f:
-    os.environ["OPENAI_API_KEY"] = f.read().strip()
-    API_KEY = os.environ["OPENAI_API_KEY"] 
-    
-client = AsyncOpenAI(api_key=API_KEY) 
+# Optional OpenAI-compatible endpoint, e.g. the local stand-in from
+# benchmarks/local_llm.py (http://localhost:10600/v1). Empty means OpenAI.
+LLM_BASE_URL = os.getenv("LLM_BASE_URL") or None
+
+# Stream the completion and return as soon as the routing JSON object closes.
+LLM_STREAM = os.getenv("LLM_STREAM", "false").lower() == "true"
+
+# The OpenAI client (and the API key file it needs) is created on the first
+# LLM call, not at import time, so the agent process comes up without it.
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        from openai import AsyncOpenAI
+
+        if LLM_BASE_URL:
+            # local endpoints don't check the key, so don't require the key file
+            api_key = os.getenv("LLM_API_KEY", "local")
+        else:
+            with open('data/api_key.txt') as f:
+                os.environ["OPENAI_API_KEY"] = f.read().strip()
+            api_key = os.environ["OPENAI_API_KEY"]
+        _client = AsyncOpenAI(api_key=api_key, base_url=LLM_BASE_URL)
+        logger.info(f"Created Async OpenAI Client (base_url={LLM_BASE_URL or 'default'})")
+    return _client
+
+
+class JSONObjectScanner:
+    """
+    Incremental scanner for the first top-level JSON object in a token stream.
+
+    feed() takes text chunks as they arrive and returns the complete object
+    text once its closing brace has been seen (None until then). Braces inside
+    strings and escaped quotes are handled, and anything before the opening
+    brace (e.g. a ```json fence) is skipped.
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.started = False
+        self.result = None
+
+    def feed(self, text: str):
+        if self.result is not None:
+            return self.result
+        start = 0
+        for i, ch in enumerate(text):
+            if not self.started:
+                if ch != "{":
+                    continue
+                self.started = True
+                start = i
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.buffer.append(text[start:i + 1])
+                    self.result = "".join(self.buffer)
+                    return self.result
+        if self.started:
+            self.buffer.append(text[start:])
+        return None
 
 class MLAgent:
     """
@@ -74,36 +144,79 @@ class MLAgent:
                 raise
 
     async def get_chat_completion(self, model_name, messages):
-        
+        if LLM_STREAM:
+            return await self.get_chat_completion_stream(model_name, messages)
 
-        logger.info("Created Async OpenAI Client")
-        #client = OpenAI()  
+        client = get_client()
         resp = await client.chat.completions.create(
             model=model_name,
             messages=messages
         )
 
-       
         logger.info("Response returned")
-        logger.info(resp)
-        #content = resp.choices[0].message.content
+        logger.debug(resp)
         
         content = resp.choices[0].message.content
 
         logger.info(f"Received response: {content}")
         return content
+
+    async def get_chat_completion_stream(self, model_name, messages):
+        """
+        Streams the completion and returns the routing JSON as soon as its
+        closing brace arrives; the rest of the stream is dropped. Falls back to
+        the full text if the model never produces a complete object.
+        """
+        client = get_client()
+        started = time.perf_counter()
+        stream = await client.chat.completions.create(
+            model=model_name,
+            messages=messages,
+            stream=True,
+        )
+
+        scanner = JSONObjectScanner()
+        received = []
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                received.append(delta)
+                decision = scanner.feed(delta) if scanner else None
+                if decision is not None:
+                    try:
+                        json.loads(decision)
+                    except ValueError:
+                        # not usable early; read the whole answer instead
+                        logger.warning(f"Streamed object is not valid JSON: {decision}")
+                        scanner = None
+                        continue
+                    logger.info(f"Routing decision after {time.perf_counter() - started:.3f}s: {decision}")
+                    return decision
+        finally:
+            await stream.close()
+
+        content = "".join(received)
+        logger.info(f"Received response (stream ended without a JSON object): {content}")
+        return content
     
     async def getModel(self):
-        default_headers = get_default_headers_based_on_authentication()
+        from langchain_openai import ChatOpenAI
+
+        # token and trust store may need the network; keep both off the event loop
+        default_headers = await aget_default_headers_based_on_authentication()
         print("Pulling default headers")
         print(default_headers)
 
 
-        http_client= get_http_client_based_on_authentication(httpx.Client)
+        http_client= await asyncio.to_thread(get_http_client_based_on_authentication, httpx.Client)
         print("Pulling http_client")
         print(http_client)
 
-        http_aclient= get_http_client_based_on_authentication(httpx.AsyncClient)
+        http_aclient= await asyncio.to_thread(get_http_client_based_on_authentication, httpx.AsyncClient)
         print("Pulling http_aclient")
         print(http_aclient)
 
@@ -1,13 +1,13 @@
 import os
-from aia_auth import auth
 import base64
 import httpx
-import math
+import asyncio
+import logging
+import threading
 import time
 import uuid
 
 
-import os
 from dotenv import load_dotenv
 
 load_dotenv('.env', override=True)
@@ -17,10 +17,7 @@ client_secret = os.getenv("CLIENT_SECRET")
 use_sso = os.getenv("USE_SSO") #False
 server_side_token_refersh = False
 
-
-print("Client ID " + client_id)
-print("Client Sercret " + client_secret)
-print("USE_SSO " + use_sso)
+logger = logging.getLogger(__name__)
 
 
 def get_correlation_id():
@@ -34,95 +31,369 @@ def validate_client_credentials():
         print("Using Client Credentials")
 
 # If using Inidividual plan, set USE_SSO to true in .env
-if use_sso:
-    print("Using Single Sign-On (SSO)")
-else:
-    validate_client_credentials()
-
-
-import requests
-import zipfile
-import io
-import certifi
-
-def update_certifi():
-    # URL to download the Dell certificates zip file
-    url = "https://pki.dell.com//Dell%20Technologies%20PKI%202018%20B64_PEM.zip"
-    print("Downloading Dell certificates zip from:", url)
-    response = requests.get(url)
-    # Use raise_for_status() for concise error checking
+# Credentials are checked on first use rather than at import time so that
+# importing this module stays cheap and never fails agent startup.
+_credentials_checked = False
+
+
+def check_credentials():
+    global _credentials_checked
+    if _credentials_checked:
+        return
+    if use_sso:
+        print("Using Single Sign-On (SSO)")
+    else:
+        validate_client_credentials()
+    _credentials_checked = True
+
+
+def _auth():
+    """Import the aia_auth client lazily; it is only needed once a token is requested."""
+    from aia_auth import auth
+    return auth
+
+
+# --------------------------------------------------------------------
+# Trust store
+# --------------------------------------------------------------------
+# The Dell CAs are merged with certifi into a private bundle that is built
+# once and reused by every process; certifi's own bundle is never modified.
+# Until the Dell zip has been downloaded once, the SSLContext starts with
+# certifi only and the download runs in a background thread; the CAs are
+# then added to the live context, which every client already shares.
+DELL_PKI_URL = "https://pki.dell.com//Dell%20Technologies%20PKI%202018%20B64_PEM.zip"
+DELL_CERT_NAMES = (
+    "Dell Technologies Root Certificate Authority 2018.pem",
+    "Dell Technologies Issuing CA 101_new.pem",
+)
+CA_CACHE_DIR = os.getenv("CA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "multiagent_mcp", "certs"))
+EXTRA_CA_RETRY_S = float(os.getenv("EXTRA_CA_RETRY_S", 300))
+
+_trust_store_lock = threading.Lock()
+_ssl_context = None
+_extra_ca = {"loaded": False, "fetching": False, "retry_at": 0.0}
+
+
+def _write_atomic(path, data: bytes):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def fetch_extra_certificates(download: bool = True) -> bytes:
+    """
+    Returns the PEM text of the extra CAs to trust.
+
+    EXTRA_CA_CERTS may point to a local PEM file. Otherwise the Dell PKI zip is
+    downloaded once and its two certificates are cached in CA_CACHE_DIR, so
+    later processes never need the network. With download=False a missing
+    cache raises FileNotFoundError instead.
+    """
+    extra_path = os.getenv("EXTRA_CA_CERTS")
+    if extra_path:
+        with open(extra_path, "rb") as f:
+            return f.read()
+
+    cached_path = os.path.join(CA_CACHE_DIR, "dell_pki.pem")
+    if os.path.exists(cached_path):
+        with open(cached_path, "rb") as f:
+            return f.read()
+    if not download:
+        raise FileNotFoundError(f"{cached_path} not downloaded yet")
+
+    import io
+    import zipfile
+    import requests
+
+    print("Downloading Dell certificates zip from:", DELL_PKI_URL)
+    response = requests.get(DELL_PKI_URL, timeout=30)
     response.raise_for_status()
-    print("Downloaded certificate zip, size:", len(response.content), "bytes")
 
-    # Determine the location of the certifi bundle
-    cert_path = certifi.where()
-    print("Certifi bundle path:", cert_path)
+    with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+        pem = b"\n".join(z.read(name).strip() for name in DELL_CERT_NAMES) + b"\n"
 
-    # Define the names of the certificates within the zip file
-    dell_root_cert_name = "Dell Technologies Root Certificate Authority 2018.pem"
-    dell_issuing_cert_name = "Dell Technologies Issuing CA 101_new.pem"
+    os.makedirs(CA_CACHE_DIR, exist_ok=True)
+    _write_atomic(cached_path, pem)
+    print("Dell certificates cached at:", cached_path)
+    return pem
 
-    # Append the certificates directly from the zip archive in memory.
-    print("Appending Dell certificates to certifi bundle...")
-    try:
-        with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-            # Read certificate contents directly from the zip file in memory
-            # Ensure decoding from bytes to string (assuming UTF-8)
-            root_cert_content = z.read(dell_root_cert_name).decode('utf-8')
-            issuing_cert_content = z.read(dell_issuing_cert_name).decode('utf-8')
-
-            # Append the certificates to the certifi bundle
-            # (Make sure you have backup of certifi bundle if needed.)
-            with open(cert_path, "a") as bundle:
-                bundle.write("\n")
-                bundle.write(root_cert_content)
-                bundle.write("\n") # Ensure newline after first cert
-                bundle.write(issuing_cert_content)
-                bundle.write("\n") # Ensure newline after second cert
-
-        print("Dell certificates successfully added to certifi bundle.")
-
-    except KeyError as e:
-        # Handle case where expected certificate file is not in the zip
-        print(f"Error: Certificate file '{e}' not found in the zip archive.")
-    except Exception as e:
-        # Handle other potential errors during processing
-        print(f"An error occurred during certificate appending: {e}")
 
+def build_trust_store(download: bool = True) -> str:
+    """
+    Builds the merged CA bundle (certifi + extra CAs) and returns its path.
 
-update_certifi()
+    The bundle is keyed by the hash of its sources, so it is only written when
+    certifi or the extra certificates change; otherwise the existing file is
+    reused as is. Falls back to the plain certifi bundle if the extra
+    certificates cannot be obtained (or, with download=False, are not cached).
+    """
+    import hashlib
+    import certifi
 
-def get_default_headers_based_on_authentication():
-    default_headers = {
+    try:
+        extra = fetch_extra_certificates(download)
+    except Exception as e:
+        if download or not isinstance(e, FileNotFoundError):  # not cached yet is expected
+            print(f"Could not load extra CA certificates, using certifi bundle only: {e}")
+        return certifi.where()
+
+    with open(certifi.where(), "rb") as f:
+        base = f.read()
+
+    key = hashlib.sha256(base + b"\0" + extra).hexdigest()[:16]
+    bundle_path = os.path.join(CA_CACHE_DIR, f"ca-bundle-{key}.pem")
+    if os.path.exists(bundle_path):
+        return bundle_path
+
+    os.makedirs(CA_CACHE_DIR, exist_ok=True)
+    _write_atomic(bundle_path, base.rstrip(b"\n") + b"\n" + extra)
+    print("Built merged CA bundle:", bundle_path)
+
+    # bundles for older source versions are no longer needed
+    for name in os.listdir(CA_CACHE_DIR):
+        if name.startswith("ca-bundle-") and name.endswith(".pem") and name != os.path.basename(bundle_path):
+            try:
+                os.remove(os.path.join(CA_CACHE_DIR, name))
+            except OSError:
+                pass
+    return bundle_path
+
+
+def get_ssl_context():
+    """
+    Returns the process-wide SSLContext, loaded once from the merged trust
+    store. Never waits for the network: without cached extra CAs it starts
+    on certifi and fetches them in the background.
+    """
+    global _ssl_context
+    if _ssl_context is None:
+        with _trust_store_lock:
+            if _ssl_context is None:
+                import ssl
+                import certifi
+                cafile = build_trust_store(download=False)
+                _ssl_context = ssl.create_default_context(cafile=cafile)
+                _extra_ca["loaded"] = cafile != certifi.where()
+    if not _extra_ca["loaded"]:
+        _fetch_extra_in_background()
+    return _ssl_context
+
+
+def _fetch_extra_in_background():
+    with _trust_store_lock:
+        if _extra_ca["loaded"] or _extra_ca["fetching"] or time.time() < _extra_ca["retry_at"]:
+            return
+        _extra_ca["fetching"] = True
+    threading.Thread(target=_load_extra_certificates, daemon=True).start()
+
+
+def _load_extra_certificates():
+    try:
+        extra = fetch_extra_certificates()
+        _ssl_context.load_verify_locations(cadata=extra.decode("ascii", "replace"))
+        _extra_ca["loaded"] = True
+        print("Extra CA certificates added to the trust store")
+    except Exception as e:
+        _extra_ca["retry_at"] = time.time() + EXTRA_CA_RETRY_S
+        print(f"Could not load extra CA certificates, using certifi bundle only "
+              f"(retry in {EXTRA_CA_RETRY_S:g}s): {e}")
+    finally:
+        _extra_ca["fetching"] = False
+
+
+# --------------------------------------------------------------------
+# Token cache
+# --------------------------------------------------------------------
+# Seconds before expiry at which a token is refreshed in the background.
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", 60))
+# Lifetime assumed when the auth response carries no expires_in.
+TOKEN_DEFAULT_TTL = int(os.getenv("TOKEN_DEFAULT_TTL", 300))
+
+
+class TokenManager:
+    """
+    Process-wide bearer token cache shared by all clients and headers.
+
+    - get_token() is thread-safe; concurrent callers that find the token
+      expired wait on one lock, so only a single refresh hits the auth server.
+    - aget_token() serves the cached token without leaving the event loop and
+      otherwise runs the blocking refresh in a worker thread.
+    - A daemon timer refreshes the token TOKEN_REFRESH_MARGIN seconds before
+      it expires, so requests normally never wait for a refresh. For tokens
+      that live less than twice the margin, the margin shrinks to half the
+      lifetime, so a short-lived token is not refreshed in a tight loop.
+    """
+
+    def __init__(self, fetch, refresh_margin: int = TOKEN_REFRESH_MARGIN):
+        self._fetch = fetch
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._timer = None
+        self._margin = refresh_margin  # for the current token
+        self.token = None
+        self.valid_until = 0.0
+
+    def _is_valid(self) -> bool:
+        return self.token is not None and time.time() < self.valid_until
+
+    def _is_due(self) -> bool:
+        return self.token is None or time.time() >= self.valid_until - self._margin
+
+    def get_token(self) -> str:
+        """Returns a valid token, refreshing it (once, under the lock) if it has expired."""
+        if self._is_valid():
+            if self._is_due():
+                # inside the margin: keep serving the current token, refresh behind it
+                self._refresh_in_background()
+            return self.token
+        with self._lock:
+            if not self._is_valid():
+                self._refresh()
+            return self.token
+
+    async def aget_token(self) -> str:
+        """Async variant of get_token; the blocking auth client never runs on the event loop."""
+        if self._is_valid():
+            if self._is_due():
+                self._refresh_in_background()
+            return self.token
+        return await asyncio.to_thread(self.get_token)
+
+    def _refresh(self):
+        # caller holds self._lock
+        logger.info("Generating new token...")
+        resp = self._fetch()
+        expires_in = getattr(resp, "expires_in", None) or TOKEN_DEFAULT_TTL
+        self.token = resp.token
+        self.valid_until = time.time() + expires_in
+        self._margin = min(self.refresh_margin, expires_in / 2)
+        self._schedule_refresh(max(expires_in - self._margin, 1))
+
+    def _schedule_refresh(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh_in_background(self):
+        # the lock is held for the whole refresh, so a busy lock means one is running
+        if not self._lock.locked():
+            threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def _background_refresh(self):
+        with self._lock:
+            if not self._is_due():
+                return  # someone refreshed in the meantime
+            try:
+                self._refresh()
+            except Exception as e:
+                logger.warning(f"Background token refresh failed, retrying: {e}")
+                remaining = self.valid_until - time.time()
+                self._schedule_refresh(max(min(30, remaining / 2), 1))
+
+
+_token_managers = {}
+_token_managers_lock = threading.Lock()
+
+
+def get_token_manager(use_sso_flow: bool) -> TokenManager:
+    """Returns the shared TokenManager for the SSO or client-credentials flow."""
+    kind = "sso" if use_sso_flow else "client_credentials"
+    with _token_managers_lock:
+        manager = _token_managers.get(kind)
+        if manager is None:
+            if use_sso_flow:
+                manager = TokenManager(lambda: _auth().sso())
+            else:
+                provider = AuthenticationProvider()
+                provider._validate_client_credentials()
+                manager = TokenManager(lambda: _auth().client_credentials(provider.client_id, provider.client_secret))
+            _token_managers[kind] = manager
+    return manager
+
+
+_default_provider = None
+
+
+def get_default_provider():
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = AuthenticationProvider()
+    return _default_provider
+
+
+def _base_headers():
+    return {
             "x-correlation-id": get_correlation_id(),
             'accept': '*/*',
             'Content-Type': 'application/json'
         }
+
+
+async def aget_default_headers_based_on_authentication():
+    """Async variant for use on the event loop: the token comes from TokenManager.aget_token()."""
+    check_credentials()
+    if use_sso:
+        default_headers = _base_headers()
+        auth = get_default_provider()
+        default_headers['Authorization'] = 'Bearer ' + await get_token_manager(auth.use_sso).aget_token()
+        return default_headers
+    return get_default_headers_based_on_authentication()
+
+
+def get_default_headers_based_on_authentication():
+    default_headers = _base_headers()
+    check_credentials()
     if use_sso:
-        auth = AuthenticationProvider()
+        auth = get_default_provider()
         default_headers['Authorization'] = 'Bearer ' + auth.generate_auth_token()
     else:
         if server_side_token_refersh:
-            auth = AuthenticationProvider()
+            auth = get_default_provider()
             default_headers['Authorization'] = 'Basic ' + auth.get_basic_credentials()
             
-    print('Authorization' + default_headers['Authorization'] )
     return default_headers
 
-import httpx
 
 def get_http_client_based_on_authentication(httpx_client_class):
+    check_credentials()
+    ssl_context = get_ssl_context()
     if use_sso:
-        http_client=httpx_client_class(verify=certifi.where())
+        http_client=httpx_client_class(verify=ssl_context)
     else:
         if server_side_token_refersh:
-            http_client=httpx_client_class(verify=certifi.where())
+            http_client=httpx_client_class(verify=ssl_context)
         else:
             auth = AuthenticationProviderWithClientSideTokenRefresh()
-            http_client=httpx_client_class(auth=auth,verify=certifi.where())
+            http_client=httpx_client_class(auth=auth,verify=ssl_context)
     return http_client
 
 
+class LazyHttpClient:
+    """
+    Stands in for the client from get_http_client_based_on_authentication
+    and builds it on first use, so the credential check and the trust store
+    are not on the agents' startup path.
+    """
+
+    def __init__(self, httpx_client_class):
+        self._client_class = httpx_client_class
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = get_http_client_based_on_authentication(self._client_class)
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+
 class AuthenticationProvider:
     def __init__(self):
         """
@@ -144,13 +415,13 @@ class AuthenticationProvider:
         The method defaults to `client_credentials` if `use_sso` is not explicitly
         set to "true".
 
+        Tokens come from the shared TokenManager, so repeated calls reuse the
+        cached token until it is about to expire.
+
         Returns:
             str: The generated authentication token.
         """
-        if self.use_sso:
-            return self._sso()
-                
-        return self._get_bearer_token()
+        return get_token_manager(self.use_sso).get_token()
     
     def get_basic_credentials(self):
         """
@@ -165,34 +436,6 @@ class AuthenticationProvider:
         self._validate_client_credentials()
         return base64.b64encode(f'{self.client_id}:{self.client_secret}'.encode()).decode()
 
-    def _get_bearer_token(self):
-        """
-        Generates an authentication token using the Client Credentials flow.
-
-        This method assumes that `client_id` and `client_secret` are globally
-        available or passed in a different context. It first validates these
-        credentials before requesting a token.
-
-        Returns:
-            str: The authentication token.
-        """
-        self._validate_client_credentials()
-        return auth.client_credentials(self.client_id, self.client_secret).token
-
-    def _sso(self):
-        """
-        Generates an authentication token using the Single Sign-On (SSO) flow.
-
-        This method leverages the `auth.sso()` function to obtain a token,
-        which typically involves a user interaction or a pre-configured
-        session.
-
-        Returns:
-            str: The authentication token.
-        """
-        access_token = auth.sso()
-        return access_token.token    
-    
     def _validate_client_credentials(self):
         """
         Validates client credentials. Checks if client ID and client secret are set and not equal to default values.
@@ -212,52 +455,52 @@ class AuthenticationProviderWithClientSideTokenRefresh(httpx.Auth):
         """
         Initializes the AuthenticationProviderWithTokenRefresh class.
 
-        Initializes the client_id, client_secret, last_refreshed, and valid_until instance variables.
+        Tokens are held by the process-wide client-credentials TokenManager,
+        so every client built with this auth shares one cached token.
         """
         # Below properties are applicableto OAUTH only
         self.client_id = os.getenv("CLIENT_ID")
         self.client_secret = os.getenv("CLIENT_SECRET")
-        self.last_refreshed = math.floor(time.time())
-        self.valid_until = math.floor(time.time()) - 1
-    
-    def auth_flow(self, request):
+
+    @property
+    def token_manager(self) -> TokenManager:
+        return get_token_manager(False)
+
+    def _apply(self, request, token):
+        if "x-correlation-id" not in request.headers:
+            request.headers["x-correlation-id"] = str(uuid.uuid4())
+        request.headers["Authorization"] = f"Bearer {token}"
+        return request
+
+    def sync_auth_flow(self, request):
         """
-        Authenticates a request using either Single Sign-On or Client & Secret based on the value of USE_SSO.
-        
+        Authenticates a request from a sync httpx.Client.
+
         Parameters:
             request: The request object to authenticate.
-        
+
         Returns:
             The authenticated request object.
         """
-        if "x-correlation-id" not in request.headers:
-            request.headers["x-correlation-id"] = str(uuid.uuid4())
-        request.headers["Authorization"] = f"Bearer {self.get_bearer_token()}"
-        yield request
+        yield self._apply(request, self.token_manager.get_token())
 
-    def get_bearer_token(self):
+    async def async_auth_flow(self, request):
         """
-        Returns the bearer token. If the current token has expired, it generates a new one using the client ID and secret.
-        
+        Authenticates a request from an httpx.AsyncClient without blocking the event loop.
+
+        Parameters:
+            request: The request object to authenticate.
+
         Returns:
-            str: The generated or existing bearer token.
+            The authenticated request object.
         """
-        if self._is_expired():
-            print("Generating new token...\n")
-            self.last_refreshed = math.floor(time.time())
-            _resp = auth.client_credentials(self.client_id, self.client_secret)
-            self.token = _resp.token
-            self.expires_in = _resp.expires_in
-            self.valid_until = self.last_refreshed + self.expires_in
-        else:
-            print("Token not expired, using cached token...\n")
-        return self.token
+        yield self._apply(request, await self.token_manager.aget_token())
 
-    def _is_expired(self):
+    def get_bearer_token(self):
         """
-        Checks if the current time is greater than or equal to the valid_until attribute.
-
+        Returns the bearer token. If the current token has expired, it generates a new one using the client ID and secret.
+        
         Returns:
-            bool: True if the current time is greater than or equal to valid_until, False otherwise.
+            str: The generated or existing bearer token.
         """
-        return time.time() >= self.valid_until
\ No newline at end of file
+        return self.token_manager.get_token()
@@ -0,0 +1,102 @@
+# benchmarks/ask_load.py
+"""
+Load generator for the supervisor's /ask endpoint.
+
+Fires a fixed number of questions at the supervisor with bounded
+concurrency and reports latency percentiles, throughput and errors. Run
+against the local LLM stand-in (benchmarks.local_llm) to benchmark the
+supervisor -> agents -> MCP chain without the real LLM.
+
+    python -m benchmarks.ask_load --requests 200 --concurrency 16
+"""
+import os
+import time
+import asyncio
+import logging
+import argparse
+import statistics
+
+import httpx
+
+from benchmarks.common import write_results
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+QUESTIONS = [
+    "What is the Academic Calendar?",
+    "Show me the UG Programs and Curriculum",
+    "Can I see the latest All Curriculum",
+    "Tell me about all curriculum and programs.",
+    "When do classes start?",
+    "Which degrees and branches are offered?",
+]
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+async def run(url: str, total: int, concurrency: int, timeout: float) -> dict:
+    latencies, errors = [], {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        async def one(i):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    res = await client.post(url, json={"question": QUESTIONS[i % len(QUESTIONS)]})
+                    key = None if res.status_code == 200 else f"http_{res.status_code}"
+                except httpx.HTTPError as e:
+                    key = type(e).__name__
+                elapsed = time.perf_counter() - started
+                if key is None:
+                    latencies.append(elapsed)
+                else:
+                    errors[key] = errors.get(key, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        wall = time.perf_counter() - started
+
+    return {
+        "url": url,
+        "requests": total,
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency_s": {
+            "mean": round(statistics.fmean(latencies), 4) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 4),
+            "p90": round(percentile(latencies, 90), 4),
+            "p99": round(percentile(latencies, 99), 4),
+            "max": round(max(latencies), 4) if latencies else 0.0,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the supervisor /ask endpoint.")
+    parser.add_argument("--url", default=os.getenv("SUPERVISOR_URL", "http://localhost:10500/ask"))
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url, args.requests, args.concurrency, args.timeout))
+    logger.info(f"{result['ok']}/{result['requests']} ok, {result['throughput_rps']} req/s, "
+                f"p50={result['latency_s']['p50']}s p99={result['latency_s']['p99']}s errors={result['errors']}")
+    write_results("ask_load", result, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/common.py
+import os
+import json
+import time
+import logging
+import platform
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# Repo root, so benchmarks can be started from anywhere.
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.getenv("BENCHMARK_RESULTS_DIR", os.path.join(ROOT_DIR, "artifacts", "benchmarks"))
+# Generated inputs (multi-GB CSVs, synthetic resource dirs) stay out of the repo tree.
+DATA_DIR = os.getenv(
+    "BENCHMARK_DATA_DIR", os.path.join(os.path.expanduser("~"), ".cache", "multiagent_mcp", "benchmarks")
+)
+
+
+def git_revision() -> str:
+    """Short commit hash of the checkout, or None outside a git repo."""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, timeout=10
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment_info() -> dict:
+    """Machine description stored next to every result so runs can be compared."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def memory_usage() -> dict:
+    """
+    Memory of the current process in MB. On Linux, pss/private come from
+    /proc/self/smaps_rollup and show how much of the RSS is shared with
+    other processes (e.g. memory-mapped files).
+    """
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty", "Shared_Clean", "Shared_Dirty"):
+                    usage[key] = int(rest.split()[0]) / 1024
+        return {
+            "rss_mb": round(usage.get("Rss", 0), 1),
+            "pss_mb": round(usage.get("Pss", 0), 1),
+            "private_mb": round(usage.get("Private_Clean", 0) + usage.get("Private_Dirty", 0), 1),
+            "shared_mb": round(usage.get("Shared_Clean", 0) + usage.get("Shared_Dirty", 0), 1),
+        }
+    except OSError:
+        pass
+    try:
+        import psutil
+        return {"rss_mb": round(psutil.Process().memory_info().rss / 2**20, 1)}
+    except ImportError:
+        return {"rss_mb": round(peak_rss_mb(), 1)}
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process in MB (0.0 where unsupported).
+    On Linux this is VmHWM, which reset_peak_rss() can rewind so peaks can
+    be measured per stage.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # bytes on macOS, KiB on Linux
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        return 0.0
+
+
+def reset_peak_rss() -> bool:
+    """Reset the peak RSS to the current RSS (Linux only); False if unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def write_results(name: str, results, output: str = None) -> str:
+    """Write a benchmark result file as JSON and return its path."""
+    output = output or os.path.join(RESULTS_DIR, f"{name}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"benchmark": name, "environment": environment_info(), "results": results}, f, indent=2)
+    logger.info(f"Results written to {output}")
+    return output
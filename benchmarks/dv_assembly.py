@@ -0,0 +1,275 @@
+# benchmarks/dv_assembly.py
+"""
+Result-page assembly with many and/or large resources.
+
+Generates synthetic resource directories shaped like the data MCP's
+output (<name>.html with <name>_css/ and <name>_images/, some PDFs) over
+a grid of resource counts and page sizes. Then, for each directory, it
+runs:
+- DVAgent.combine_results, iframe and bundle mode, cold (new agent) and
+  warm (cached manifest/cards);
+- mcp_dv POST /visualize/userresults, driven directly over ASGI so the
+  stream is consumed chunk by chunk (time to first byte + total);
+- the student UI's clean_dv_html on each of the pages above.
+
+Per path it reports median/min latency, peak traced memory (tracemalloc,
+measured in a separate run so it doesn't slow the timed runs) and output
+size. Every case runs in a fresh interpreter, because both servers read
+their directories at import time. The git revision is stored with the
+results, so runs before and after a change can be compared.
+
+    python -m benchmarks.dv_assembly
+    python -m benchmarks.dv_assembly --counts 100,1000 --sizes-kb 10,2000 --repeats 3
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import statistics
+import subprocess
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.common import ROOT_DIR, DATA_DIR, write_results
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+RESOURCES_DIR = os.path.join(DATA_DIR, "dv_resources")
+SHARED_CSS_KB = 64   # bootstrap-like stylesheet every page links (identical copies)
+PDF_EVERY = 10       # every 10th resource is a PDF
+
+
+# --------------------------------------------------------------------
+# Synthetic Resources
+# --------------------------------------------------------------------
+def synthetic_css(kb: int, prefix: str, seed: int) -> str:
+    rng = np.random.default_rng(seed)
+    rules, size = [], 0
+    while size < kb * 1024:
+        rule = (f"/* {prefix} rule */\n.{prefix}-{len(rules)} > .item:hover, body .{prefix}-{len(rules)}-b {{\n"
+                f"    margin: {rng.integers(0, 20)}px;  color: #{rng.integers(0, 0xFFFFFF):06x};\n"
+                f"    background: url(\"../img/{prefix}{len(rules) % 7}.png\");\n}}\n")
+        rules.append(rule)
+        size += len(rule)
+    rules.append("@media (max-width: 600px) { body .%s-0 { display: none; } }\n" % prefix)
+    return "".join(rules)
+
+
+def synthetic_page(name: str, kb: int, seed: int) -> str:
+    """A scraped-looking page: linked CSS, inline style and script, handlers, images, tables."""
+    rng = np.random.default_rng(seed)
+    head = (f"<html><head><title>{name}</title><meta charset='utf-8'>"
+            f"<link href=\"./{name}_css/shared.min.css\" rel=\"stylesheet\"/>"
+            f"<link href=\"./{name}_css/page.css\" rel=\"stylesheet\"/>"
+            f"<style>body {{ font-size: 14px; }} .{name} td {{ padding: 2px; }}</style>"
+            f"<script>var tracker = '{name}';</script></head><body class=\"{name}\">")
+    parts, size, block = [head], len(head), 0
+    while size < kb * 1024:
+        cells = "".join(f"<td>{v:.4f}</td>" for v in rng.random(8))
+        chunk = (f"<div class=\"row\" id=\"b{block}\"><h3 onclick=\"toggle({block})\">Section {block}</h3>"
+                 f"<p>Course {block} covers {' '.join(['lorem ipsum dolor'] * 8)}.</p>"
+                 f"<img src=\"./{name}_images/i{block % 5}.png\" alt=\"\"/>"
+                 f"<a href=\"javascript:void(0)\">more</a>"
+                 f"<table><tr>{cells}</tr><tr>{cells}</tr></table></div>\n")
+        parts.append(chunk)
+        size += len(chunk)
+        block += 1
+    parts.append("<script>init();</script></body></html>")
+    return "".join(parts)
+
+
+def synthetic_resources(count: int, page_kb: int) -> str:
+    """Resource dir with count resources of ~page_kb each; cached and reused by later runs."""
+    root = os.path.join(RESOURCES_DIR, f"{count}x{page_kb}kb")
+    if os.path.exists(os.path.join(root, ".complete")):
+        return root
+    os.makedirs(root, exist_ok=True)
+    started = time.perf_counter()
+    shared = os.path.join(root, ".shared.min.css")
+    with open(shared, "w") as f:
+        f.write(synthetic_css(SHARED_CSS_KB, "bs", 0))
+    for i in range(count):
+        name = f"resource_{i:04d}"
+        if i % PDF_EVERY == PDF_EVERY - 1:
+            with open(os.path.join(root, f"{name}.pdf"), "wb") as f:
+                f.write(b"%PDF-1.4\n" + b"0" * 1024 + b"\n%%EOF\n")
+            continue
+        css_dir = os.path.join(root, f"{name}_css")
+        os.makedirs(css_dir, exist_ok=True)
+        # identical copies like the scraper's per-page bootstrap; hard links save disk
+        os.link(shared, os.path.join(css_dir, "shared.min.css"))
+        with open(os.path.join(css_dir, "page.css"), "w") as f:
+            f.write(synthetic_css(2, f"p{i}", i))
+        with open(os.path.join(root, f"{name}.html"), "w") as f:
+            f.write(synthetic_page(name, page_kb, i))
+    open(os.path.join(root, ".complete"), "w").close()
+    logger.info(f"Generated {root} in {time.perf_counter() - started:.1f}s")
+    return root
+
+
+# --------------------------------------------------------------------
+# Measurement (child process)
+# --------------------------------------------------------------------
+async def measure(fn, repeats: int, setup=None) -> dict:
+    """Median/min wall time over repeats, then one traced run for peak memory."""
+    times = []
+    for _ in range(repeats):
+        args = setup() if setup else ()
+        started = time.perf_counter()
+        result = await fn(*args)
+        times.append(time.perf_counter() - started)
+    args = setup() if setup else ()
+    tracemalloc.start()
+    await fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    stats = result.pop("stats", {}) if isinstance(result, dict) else {}
+    return {
+        "wall_ms_median": round(statistics.median(times) * 1e3, 3),
+        "wall_ms_min": round(min(times) * 1e3, 3),
+        "peak_traced_mb": round(peak / 2**20, 2),
+        **stats,
+    }
+
+
+async def post_streaming(app, path: str, payload: dict, keep_body: bool = False) -> dict:
+    """POST to an ASGI app and consume the response chunk by chunk."""
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+    received = False
+    stats = {"status": None, "output_bytes": 0, "chunks": 0, "first_byte_ms": None}
+    chunks = [] if keep_body else None
+    started = time.perf_counter()
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)  # no disconnect; cancelled when the response ends
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            stats["status"] = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body"):
+            if stats["first_byte_ms"] is None:
+                stats["first_byte_ms"] = round((time.perf_counter() - started) * 1e3, 3)
+            stats["output_bytes"] += len(message["body"])
+            stats["chunks"] += 1
+            if keep_body:
+                chunks.append(message["body"])
+
+    await app(scope, receive, send)
+    return {"stats": stats, "body": b"".join(chunks).decode() if keep_body else None}
+
+
+def run_case(root: str, repeats: int) -> dict:
+    """Runs inside the child; DATA_OUTPUT_DIR and DV_RESULTS_DIR already point at root."""
+    from agents.dv_agent.dv_agent import DVAgent
+    from mcp_servers import mcp_dv
+    from student_ui.app import clean_dv_html
+
+    names = sorted(n for n in os.listdir(root) if n.endswith((".html", ".pdf")))
+    results, pages = {}, {}
+
+    def cold_agent():
+        agent = DVAgent()
+        agent.manifest.mark_dirty()  # the manifest is shared across instances; force a rescan
+        return (agent,)
+
+    async def run():
+        for mode in ("iframe", "bundle"):
+            async def combine(agent, mode=mode):
+                page = await agent.combine_results({"mode": mode})
+                pages[mode] = page
+                return {"stats": {"output_bytes": len(page.encode())}}
+            results[f"combine_results_{mode}_cold"] = await measure(combine, repeats, setup=cold_agent)
+            warm = DVAgent()
+            await warm.combine_results({"mode": mode})
+            results[f"combine_results_{mode}_warm"] = await measure(combine, repeats, setup=lambda: (warm,))
+
+        async def userresults():
+            return await post_streaming(mcp_dv.app, "/visualize/userresults", {"files": names})
+        results["mcp_dv_userresults"] = await measure(userresults, repeats)
+        pages["userresults"] = (await post_streaming(mcp_dv.app, "/visualize/userresults",
+                                                     {"files": names}, keep_body=True))["body"]
+
+        for source, page in pages.items():
+            async def clean(page=page):
+                return {"stats": {"input_bytes": len(page.encode()), "output_bytes": len(clean_dv_html(page).encode())}}
+            results[f"clean_dv_html_{source}"] = await measure(clean, repeats)
+
+    asyncio.run(run())
+    return results
+
+
+# --------------------------------------------------------------------
+# Driver
+# --------------------------------------------------------------------
+def run_case_subprocess(root: str, repeats: int, timeout: float) -> dict:
+    env = {
+        **os.environ,
+        "PYTHONPATH": ROOT_DIR,
+        "DATA_OUTPUT_DIR": root,
+        "DV_RESULTS_DIR": root,
+        "DV_RENDER_CACHE_MB": "0",
+    }
+    cmd = [sys.executable, "-m", "benchmarks.dv_assembly", "--case", root, "--repeats", str(repeats)]
+    try:
+        started = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=ROOT_DIR, env=env, capture_output=True, text=True, timeout=timeout)
+        if proc.returncode != 0:
+            return {"status": "failed", "error": proc.stderr.strip().splitlines()[-1:]}
+        paths = json.loads(proc.stdout.strip().splitlines()[-1])
+        return {"status": "ok", "total_s": round(time.perf_counter() - started, 3), "paths": paths}
+    except subprocess.TimeoutExpired:
+        return {"status": "timeout", "timeout_s": timeout}
+
+
+def parse_ints(text: str) -> list:
+    return [int(float(x)) for x in text.split(",") if x]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DV result-page assembly benchmark.")
+    parser.add_argument("--counts", default="10,100,1000", help="comma-separated resource counts")
+    parser.add_argument("--sizes-kb", default="10,200,2000", help="comma-separated page sizes in KB")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--max-total-mb", type=float, default=1000, help="skip cases with more count x size")
+    parser.add_argument("--timeout", type=float, default=1800, help="per-case timeout in seconds")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--case", help=argparse.SUPPRESS)  # internal: run one case and print JSON
+    args = parser.parse_args()
+
+    if args.case:
+        logging.getLogger().setLevel(logging.WARNING)  # the servers log every request at INFO
+        print(json.dumps(run_case(args.case, max(1, args.repeats))))
+        return
+
+    cases = []
+    for count in parse_ints(args.counts):
+        for page_kb in parse_ints(args.sizes_kb):
+            case = {"resources": count, "page_kb": page_kb}
+            total_mb = count * page_kb / 1024
+            if total_mb > args.max_total_mb:
+                cases.append({**case, "status": "skipped", "reason": f"~{total_mb:.0f} MB > {args.max_total_mb:g} MB"})
+                continue
+            logger.info(f"Case {count} resources x {page_kb} KB")
+            root = synthetic_resources(count, page_kb)
+            cases.append({**case, **run_case_subprocess(root, args.repeats, args.timeout)})
+
+    write_results("dv_assembly", {"cases": cases}, args.output)
+
+
+if __name__ == "__main__":
+    main()
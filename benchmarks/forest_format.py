@@ -0,0 +1,114 @@
+# benchmarks/forest_format.py
+"""
+Packed forest format vs joblib pickles.
+
+Trains a RandomForestRegressor on synthetic data, stores it both as a joblib
+pickle and in the packed array format (mcp_servers/ml/forest_pack.py), then
+starts several worker processes per format that each load the model and
+predict a batch. Reports load time, per-worker RSS/PSS/private memory and
+prediction throughput.
+
+    python -m benchmarks.forest_format --trees 200 --rows 100000 --workers 4
+"""
+import os
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import multiprocessing
+
+import numpy as np
+import joblib
+from sklearn.datasets import make_regression
+from sklearn.ensemble import RandomForestRegressor
+
+from benchmarks.common import memory_usage, write_results
+from mcp_servers.ml.forest_pack import pack_forest, load_packed
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+
+def dir_size_mb(path: str) -> float:
+    if os.path.isfile(path):
+        return os.path.getsize(path) / 2**20
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 2**20
+
+
+def worker(fmt: str, path: str, X: np.ndarray, ready, go, results):
+    """Load the model, predict once, then report memory while all workers are alive."""
+    started = time.perf_counter()
+    model = joblib.load(path) if fmt == "joblib" else load_packed(path)
+    load_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    model.predict(X)
+    predict_s = time.perf_counter() - started
+
+    ready.wait()  # every worker holds its model now
+    results.put({"load_s": load_s, "predict_s": predict_s, **memory_usage()})
+    go.wait()
+
+
+def run_format(fmt: str, path: str, X: np.ndarray, workers: int) -> dict:
+    ctx = multiprocessing.get_context("spawn")  # no pages inherited from the parent
+    ready, go = ctx.Barrier(workers + 1), ctx.Barrier(workers + 1)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(fmt, path, X, ready, go, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    ready.wait()
+    rows = [results.get() for _ in procs]
+    go.wait()
+    for p in procs:
+        p.join()
+
+    def mean(key):
+        return round(float(np.mean([r[key] for r in rows if key in r])), 4)
+
+    return {
+        "size_on_disk_mb": round(dir_size_mb(path), 2),
+        "load_s": mean("load_s"),
+        "predict_s": mean("predict_s"),
+        "throughput_rows_per_s": round(len(X) / mean("predict_s")),
+        "per_worker": {k: mean(k) for k in ("rss_mb", "pss_mb", "private_mb", "shared_mb") if k in rows[0]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Packed forest vs joblib benchmark.")
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--train-rows", type=int, default=20000)
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=100000, help="rows per prediction batch")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    X, y = make_regression(n_samples=args.train_rows, n_features=args.features, noise=0.1, random_state=0)
+    model = RandomForestRegressor(n_estimators=args.trees, random_state=0, n_jobs=-1).fit(X, y)
+    model.n_jobs = None  # single-threaded predict, same as the packed predictor
+    X_pred = np.random.default_rng(1).normal(size=(args.rows, args.features))
+
+    tmp_dir = tempfile.mkdtemp(prefix="forest_format_")
+    try:
+        pickle_path = os.path.join(tmp_dir, "model.joblib")
+        joblib.dump(model, pickle_path)
+        packed_path = pack_forest(model, os.path.join(tmp_dir, "forest"))
+
+        expected = model.predict(X_pred[:1000])
+        assert np.allclose(load_packed(packed_path).predict(X_pred[:1000]), expected)
+
+        results = {"config": vars(args)}
+        for fmt, path in (("joblib", pickle_path), ("packed_mmap", packed_path)):
+            results[fmt] = run_format(fmt, path, X_pred, args.workers)
+            logger.info(f"{fmt}: {results[fmt]}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    write_results("forest_format", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
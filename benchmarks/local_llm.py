@@ -0,0 +1,194 @@
+# benchmarks/local_llm.py
+"""
+OpenAI-compatible local stand-in for the routing LLM.
+
+Speaks enough of the chat-completions API for MLAgent (plain and streamed
+responses) and answers with the same {"method": "..."} JSON the real model
+is prompted for, chosen by keyword rules. Latency, token pacing and error
+injection are configurable so the supervisor -> agents -> MCP chain can be
+load-tested offline.
+
+    python -m benchmarks.local_llm --port 10600 --latency lognormal:-1.5:0.4 --error-rate 0.02
+
+Point the ML agent at it with LLM_BASE_URL=http://localhost:10600/v1.
+
+Latency specs (seconds): fixed:<s>, uniform:<lo>:<hi>, normal:<mu>:<sigma>,
+lognormal:<mu>:<sigma>, exp:<mean>.
+"""
+import os
+import re
+import json
+import time
+import uuid
+import random
+import asyncio
+import logging
+import argparse
+
+from fastapi import FastAPI, Body
+from fastapi.responses import JSONResponse, StreamingResponse
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+app = FastAPI(title="Local LLM stand-in", version="1.0")
+
+# --------------------------------------------------------------------
+# Configuration (env-overridable, CLI flags win)
+# --------------------------------------------------------------------
+config = {
+    "latency": os.getenv("LOCAL_LLM_LATENCY", "fixed:0"),
+    "token_delay": float(os.getenv("LOCAL_LLM_TOKEN_DELAY", 0.01)),
+    "chunk_chars": int(os.getenv("LOCAL_LLM_CHUNK_CHARS", 4)),
+    "error_rate": float(os.getenv("LOCAL_LLM_ERROR_RATE", 0)),
+    "error_codes": [int(c) for c in os.getenv("LOCAL_LLM_ERROR_CODES", "429,500,503").split(",")],
+}
+rng = random.Random(int(os.getenv("LOCAL_LLM_SEED", 0)) or None)
+
+# Same method names and mapping guidelines as MLAgent.getPromptMulti, in priority order.
+ROUTING_RULES = [
+    ("all_curriculum", ("all curriculum", "all curriculam", "consolidated", "complete syllabus", "all syllabus")),
+    ("academic_calendar", ("calendar", "calander", "date", "exam", "event", "holiday", "semester start",
+                           "classes start", "when do")),
+    ("ug_curriculum", ("ug", "undergraduate", "syllabus", "course", "subject", "curriculum", "curriculam")),
+    ("academic_programs", ("program", "branch", "degree", "mtech", "btech", "phd")),
+]
+DEFAULT_METHOD = "academic_programs"
+
+
+def sample_latency(spec: str) -> float:
+    """Draw one latency (seconds) from a spec such as 'uniform:0.1:0.5'."""
+    kind, *params = spec.split(":")
+    p = [float(x) for x in params]
+    if kind == "fixed":
+        value = p[0]
+    elif kind == "uniform":
+        value = rng.uniform(p[0], p[1])
+    elif kind == "normal":
+        value = rng.gauss(p[0], p[1])
+    elif kind == "lognormal":
+        value = rng.lognormvariate(p[0], p[1])
+    elif kind == "exp":
+        value = rng.expovariate(1.0 / p[0])
+    else:
+        raise ValueError(f"Unknown latency distribution '{kind}'")
+    return max(0.0, value)
+
+
+def route(question: str) -> str:
+    """Rule-based stand-in for the method selector prompt; may return several methods."""
+    q = question.lower()
+    methods = []
+    for method, keywords in ROUTING_RULES:
+        # keywords match at a word start, so "program" also hits "programs"
+        if any(re.search(r"\b" + re.escape(k), q) for k in keywords):
+            methods.append(method)
+    # "all curriculum" already covers the UG curriculum
+    if "all_curriculum" in methods and "ug_curriculum" in methods:
+        methods.remove("ug_curriculum")
+    return ",".join(methods) or DEFAULT_METHOD
+
+
+def completion_content(messages: list) -> str:
+    user_messages = [m.get("content") or "" for m in messages if m.get("role") == "user"]
+    question = user_messages[-1] if user_messages else ""
+    return json.dumps({"method": route(question)})
+
+
+def error_response():
+    status = rng.choice(config["error_codes"])
+    logger.info(f"Injecting error {status}")
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": f"Injected error {status}", "type": "server_error", "code": status}},
+    )
+
+
+# --------------------------------------------------------------------
+# API Endpoints
+# --------------------------------------------------------------------
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "local-router", "object": "model", "owned_by": "local"}]}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(payload: dict = Body(default={})):
+    model = payload.get("model", "local-router")
+    messages = payload.get("messages", [])
+
+    await asyncio.sleep(sample_latency(config["latency"]))
+    if config["error_rate"] and rng.random() < config["error_rate"]:
+        return error_response()
+
+    content = completion_content(messages)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+    prompt_tokens = sum(len((m.get("content") or "").split()) for m in messages)
+    completion_tokens = max(1, len(content) // config["chunk_chars"])
+
+    if not payload.get("stream"):
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    async def stream():
+        def chunk(delta, finish_reason=None):
+            body = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(body)}\n\n"
+
+        yield chunk({"role": "assistant", "content": ""})
+        step = config["chunk_chars"]
+        for i in range(0, len(content), step):
+            if config["token_delay"]:
+                await asyncio.sleep(config["token_delay"])
+            yield chunk({"content": content[i:i + step]})
+        yield chunk({}, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+# --------------------------------------------------------------------
+# Main Entrypoint
+# --------------------------------------------------------------------
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="OpenAI-compatible local LLM stand-in.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("LOCAL_LLM_PORT", 10600)))
+    parser.add_argument("--latency", default=config["latency"], help="e.g. fixed:0.2, uniform:0.1:0.5")
+    parser.add_argument("--token-delay", type=float, default=config["token_delay"])
+    parser.add_argument("--chunk-chars", type=int, default=config["chunk_chars"])
+    parser.add_argument("--error-rate", type=float, default=config["error_rate"])
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    sample_latency(args.latency)  # fail fast on a bad spec
+    config.update(latency=args.latency, token_delay=args.token_delay,
+                  chunk_chars=max(1, args.chunk_chars), error_rate=args.error_rate)
+    if args.seed is not None:
+        rng.seed(args.seed)
+
+    logger.info(f"Local LLM stand-in on http://{args.host}:{args.port}/v1 with {config}")
+    uvicorn.run(app, host=args.host, port=args.port)
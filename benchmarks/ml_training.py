@@ -0,0 +1,195 @@
+# benchmarks/ml_training.py
+"""
+Scaling benchmark for the ML MCP training pipeline.
+
+Generates synthetic regression CSVs over a grid of row and feature counts
+and runs load -> split -> train -> evaluate -> save for each one. Every
+case runs in a fresh interpreter so memory numbers don't leak between
+cases. Per stage it records wall time, peak RSS, the RSS after the stage
+and rows/s.
+
+Datasets are cached under BENCHMARK_DATA_DIR/datasets/ (outside the repo,
+~/.cache/multiagent_mcp/benchmarks by default) and reused by later runs. Cases over --max-cells (rows x features) are recorded as
+skipped instead of exhausting the machine.
+
+    python -m benchmarks.ml_training
+    python -m benchmarks.ml_training --rows 10000,1000000 --features 10,100 --trees 50
+    python -m benchmarks.ml_training --full --mode stream
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+from benchmarks.common import ROOT_DIR, DATA_DIR, memory_usage, peak_rss_mb, reset_peak_rss, write_results
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+FULL_ROWS = [10_000, 100_000, 1_000_000, 10_000_000]
+FULL_FEATURES = [10, 50, 100, 500]
+DATASETS_DIR = os.path.join(DATA_DIR, "datasets")
+
+
+# --------------------------------------------------------------------
+# Synthetic Data
+# --------------------------------------------------------------------
+def synthetic_csv(rows: int, features: int, seed: int = 0, chunk_rows: int = 100_000) -> str:
+    """Linear target plus noise and a few interactions, written in chunks."""
+    path = os.path.join(DATASETS_DIR, f"reg_{rows}x{features}_s{seed}.csv")
+    if os.path.exists(path):
+        return path
+    os.makedirs(DATASETS_DIR, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    weights = rng.normal(size=features)
+    header = ",".join([f"f{i}" for i in range(features)] + ["target"])
+    started = time.perf_counter()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(header + "\n")
+        for start in range(0, rows, chunk_rows):
+            n = min(chunk_rows, rows - start)
+            X = rng.normal(size=(n, features)).astype(np.float32)
+            y = X @ weights + X[:, 0] * X[:, min(1, features - 1)] + rng.normal(scale=0.5, size=n)
+            np.savetxt(f, np.column_stack([X, y]), delimiter=",", fmt="%.6g")
+    os.replace(tmp_path, path)
+    logger.info(f"Generated {path} in {time.perf_counter() - started:.1f}s")
+    return path
+
+
+# --------------------------------------------------------------------
+# One Case (child process)
+# --------------------------------------------------------------------
+class StageRecorder:
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.stages = {}
+
+    def run(self, name: str, fn, *args, **kwargs):
+        reset_peak_rss()
+        started = time.perf_counter()
+        value = fn(*args, **kwargs)
+        wall_s = time.perf_counter() - started
+        self.stages[name] = {
+            "wall_s": round(wall_s, 4),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "rss_after_mb": memory_usage()["rss_mb"],
+            "rows_per_s": round(self.rows / wall_s) if wall_s else None,
+        }
+        logger.info(f"  {name}: {self.stages[name]}")
+        return value
+
+
+def run_case(csv_path: str, mode: str, trees: int) -> dict:
+    """Runs inside the child; the environment already points all outputs at a temp dir."""
+    from mcp_servers.ml import pipeline
+    from mcp_servers.ml.registry import ModelRegistry
+    from mcp_servers.ml.streaming import train_streaming, evaluate_streaming
+
+    target_col = os.environ["TARGET_COLUMN"]
+    rows = sum(1 for _ in open(csv_path)) - 1
+    rec = StageRecorder(rows)
+    params = {**pipeline.DEFAULT_TRAIN_PARAMS, "n_estimators": trees, "n_jobs": -1, "importance": "off"}
+
+    if mode == "stream":
+        trained = rec.run("train", train_streaming, csv_path, target_col, {})
+        rec.run("evaluate", evaluate_streaming, trained["model"], csv_path, trained["features"],
+                target_col, {}, trained["chunk_rows"])
+        return rec.stages
+
+    rec.run("load_cold", pipeline.load_training_data, target_col)  # CSV -> column cache
+    X, y, dataset_hash = rec.run("load", pipeline.load_training_data, target_col)
+
+    def split():
+        train_rows, test_rows = pipeline.holdout_split(len(X), params["test_size"], params["random_state"])
+        return X.iloc[train_rows], X.iloc[test_rows], y.iloc[train_rows], y.iloc[test_rows]
+
+    X_train, X_test, y_train, y_test = rec.run("split", split)
+    model = rec.run("train", pipeline.train_random_forest, X_train, y_train, params)
+    metrics, y_pred = rec.run("evaluate", pipeline.evaluate_model, model, X_test, y_test, -1)
+
+    def save():
+        pipeline.save_artifacts(model, y_test, y_pred, X_train, X_test, metrics)
+        ModelRegistry().register(model, metrics, dataset_hash, pipeline.forest_params(params), list(X.columns))
+
+    rec.run("save", save)
+    rec.stages["metrics"] = metrics
+    return rec.stages
+
+
+# --------------------------------------------------------------------
+# Driver
+# --------------------------------------------------------------------
+def run_case_subprocess(csv_path: str, mode: str, trees: int, timeout: float) -> dict:
+    work_dir = tempfile.mkdtemp(prefix="ml_bench_")
+    env = {
+        **os.environ,
+        "PYTHONPATH": ROOT_DIR,
+        "DATA_PROCESSED_PATH": csv_path,
+        "TARGET_COLUMN": "target",
+        "DATASET_CACHE_DIR": os.path.join(work_dir, "cache"),
+        "ML_REGISTRY_DIR": os.path.join(work_dir, "registry"),
+        "MODEL_PATH": os.path.join(work_dir, "models", "model.pkl"),
+        "FEATURE_IMPORTANCE_PATH": os.path.join(work_dir, "feature_importances.json"),
+    }
+    cmd = [sys.executable, "-m", "benchmarks.ml_training", "--case", csv_path, "--mode", mode, "--trees", str(trees)]
+    try:
+        started = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=work_dir, env=env, capture_output=True, text=True, timeout=timeout)
+        if proc.returncode != 0:
+            return {"status": "failed", "error": proc.stderr.strip().splitlines()[-1:]}
+        stages = json.loads(proc.stdout.strip().splitlines()[-1])
+        return {"status": "ok", "total_s": round(time.perf_counter() - started, 3), "stages": stages}
+    except subprocess.TimeoutExpired:
+        return {"status": "timeout", "timeout_s": timeout}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def parse_ints(text: str) -> list:
+    return [int(float(x)) for x in text.split(",") if x]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ML training pipeline scaling benchmark.")
+    parser.add_argument("--rows", default="10000,100000", help="comma-separated row counts")
+    parser.add_argument("--features", default="10,100", help="comma-separated feature counts")
+    parser.add_argument("--full", action="store_true", help="10k..10M rows x 10..500 features")
+    parser.add_argument("--mode", default="memory", choices=["memory", "stream"])
+    parser.add_argument("--trees", type=int, default=50)
+    parser.add_argument("--max-cells", type=float, default=2e8, help="skip cases with more rows x features")
+    parser.add_argument("--timeout", type=float, default=3600, help="per-case timeout in seconds")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--case", help=argparse.SUPPRESS)  # internal: run one case and print JSON
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.mode, args.trees)))
+        return
+
+    rows_grid = FULL_ROWS if args.full else parse_ints(args.rows)
+    features_grid = FULL_FEATURES if args.full else parse_ints(args.features)
+    cases = []
+    for rows in rows_grid:
+        for features in features_grid:
+            case = {"rows": rows, "features": features, "mode": args.mode, "trees": args.trees}
+            if rows * features > args.max_cells:
+                cases.append({**case, "status": "skipped", "reason": f"rows x features > {args.max_cells:g}"})
+                continue
+            logger.info(f"Case {rows} x {features} ({args.mode})")
+            csv_path = synthetic_csv(rows, features)
+            case["csv_mb"] = round(os.path.getsize(csv_path) / 2**20, 1)
+            cases.append({**case, **run_case_subprocess(csv_path, args.mode, args.trees, args.timeout)})
+
+    write_results(f"ml_training_{args.mode}", {"cases": cases}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# benchmarks/startup_time.py
+"""
+Startup-time report for the agent processes.
+
+Each target is imported in a fresh interpreter with ``python -X importtime``;
+the per-module timings are parsed from stderr and the slowest imports are
+reported together with the wall time until the process is "ready" (modules
+imported and the agent executor constructed).
+
+For the agents, the real entry point is then started as well
+(``python -m agents.<name>.agent_main`` on a free local port) and timed
+until its agent card answers, i.e. until main() is serving requests.
+
+    python -m benchmarks.startup_time
+    python -m benchmarks.startup_time --top 30 --output startup.json
+"""
+import sys
+import time
+import socket
+import logging
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+from benchmarks.common import ROOT_DIR, write_results
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+# name -> statement that brings the process to the point where uvicorn would start
+TARGETS = {
+    "authentication_provider": "import authentication_provider",
+    "data_agent": "import agents.data_agent.agent_main; "
+                  "from agents.data_agent.agent_executor import DataAgentExecutor; DataAgentExecutor()",
+    "ml_agent": "import agents.ml_agent.agent_main; "
+                "from agents.ml_agent.agent_executor import MLAgentExecutor; MLAgentExecutor()",
+    "dv_agent": "import agents.dv_agent.agent_main; "
+                "from agents.dv_agent.agent_executor import DVAgentExecutor; DVAgentExecutor()",
+}
+
+
+# name -> module whose main() runs the server
+SERVERS = {
+    "data_agent": "agents.data_agent.agent_main",
+    "ml_agent": "agents.ml_agent.agent_main",
+    "dv_agent": "agents.dv_agent.agent_main",
+}
+
+
+def parse_importtime(stderr: str) -> list:
+    """Parse ``-X importtime`` lines into (module, self_us, cumulative_us) tuples."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            _, values = line.split(":", 1)
+            self_us, cumulative_us, module = values.split("|", 2)
+            rows.append((module.rstrip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def measure(name: str, statement: str, top: int) -> dict:
+    """Import a target in a fresh interpreter and summarize where the time went."""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+
+    rows = parse_importtime(proc.stderr)
+    # top-level modules are the ones without indentation in the module column
+    top_level = [r for r in rows if not r[0].startswith("  ")]
+    slowest = sorted(rows, key=lambda r: r[2], reverse=True)[:top]
+
+    result = {
+        "statement": statement,
+        "ok": proc.returncode == 0,
+        "ready_wall_s": round(wall, 4),
+        "import_total_s": round(sum(r[2] for r in top_level) / 1e6, 4),
+        "modules_imported": len(rows),
+        "slowest_imports": [
+            {"module": m.strip(), "self_ms": round(s / 1000, 2), "cumulative_ms": round(c / 1000, 2)}
+            for m, s, c in slowest
+        ],
+    }
+    if proc.returncode != 0:
+        result["error"] = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+    return result
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_serving(module: str, timeout: float) -> dict:
+    """Start an agent's main() and time it until /.well-known/agent-card.json answers."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/.well-known/agent-card.json"
+    with tempfile.TemporaryFile("w+") as log:
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", module, "--host", "127.0.0.1", "--port", str(port)],
+            cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=log, text=True,
+        )
+        try:
+            while time.perf_counter() - started < timeout:
+                if proc.poll() is not None:
+                    log.seek(0)
+                    lines = log.read().strip().splitlines()
+                    return {"serving_ok": False, "serving_error": lines[-1] if lines else "exited"}
+                try:
+                    with urllib.request.urlopen(url, timeout=1) as response:
+                        if response.status == 200:
+                            return {"serving_ok": True, "serving_wall_s": round(time.perf_counter() - started, 4)}
+                except OSError:
+                    pass  # not listening yet
+                time.sleep(0.02)
+            return {"serving_ok": False, "serving_error": f"not serving after {timeout:g}s"}
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent startup-time benchmark (python -X importtime).")
+    parser.add_argument("--targets", nargs="*", default=list(TARGETS), choices=list(TARGETS))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per target; the fastest is kept")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to report")
+    parser.add_argument("--serve-timeout", type=float, default=60, help="seconds to wait for an agent to serve")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.targets:
+        runs = [measure(name, TARGETS[name], args.top) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["ready_wall_s"])
+        results[name] = best
+        status = "ok" if best["ok"] else f"FAILED ({best.get('error')})"
+        logger.info(f"{name:<24} ready in {best['ready_wall_s']:.3f}s "
+                    f"(imports {best['import_total_s']:.3f}s, {best['modules_imported']} modules) {status}")
+        for row in best["slowest_imports"][:5]:
+            logger.info(f"    {row['cumulative_ms']:>9.1f} ms  {row['module']}")
+
+        if name in SERVERS:
+            runs = [measure_serving(SERVERS[name], args.serve_timeout) for _ in range(args.repeat)]
+            served = [r for r in runs if r["serving_ok"]]
+            best.update(min(served, key=lambda r: r["serving_wall_s"]) if served else runs[-1])
+            if best["serving_ok"]:
+                logger.info(f"{name:<24} serving in {best['serving_wall_s']:.3f}s")
+            else:
+                logger.info(f"{name:<24} serving FAILED ({best['serving_error']})")
+
+    write_results("startup_time", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
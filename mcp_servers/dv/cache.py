@@ -0,0 +1,194 @@
+# mcp_servers/dv/cache.py
+"""
+Content-addressed cache for rendered plots.
+
+An entry is keyed by the hash of the plot's input data, the plot kind and
+the render parameters. It holds the rendered file(s) plus entry.json with
+metadata (row count, render mode, ...). Cached files are hard-linked into
+the results directory (copied across filesystems), so a repeat view of
+the same data costs a hash lookup and a link instead of a CSV parse and
+a render.
+
+The cache has an on-disk budget. Entries are evicted least recently used
+first; a hit refreshes the entry's position.
+"""
+import os
+import json
+import time
+import shutil
+import contextlib
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("DV_RENDER_CACHE_DIR", "./artifacts/dv_cache")
+CACHE_MB = float(os.getenv("DV_RENDER_CACHE_MB", 256))
+
+DIGESTS_MAX = int(os.getenv("DV_DIGEST_MEMO_SIZE", 4096))
+
+# (path, size, mtime_ns) -> sha256, so unchanged inputs are hashed once;
+# least recently used first, at most DIGESTS_MAX entries
+_digests = OrderedDict()
+_digests_lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file, remembered against its size and mtime."""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _digests_lock:
+        if key in _digests:
+            _digests.move_to_end(key)
+            return _digests[key]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    with _digests_lock:
+        _digests[key] = digest.hexdigest()
+        while len(_digests) > DIGESTS_MAX:
+            _digests.popitem(last=False)
+    return digest.hexdigest()
+
+
+def content_digest(value) -> str:
+    """SHA-256 of a JSON-serializable value."""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def place_file(src: str, dest: str):
+    """
+    Put src at dest through a new inode: hard link (or copy) to a temp
+    name, then rename. A file that is linked from the cache is never
+    written in place.
+    """
+    if os.path.exists(dest) and os.path.samefile(src, dest):
+        return  # already linked; rename() onto the same inode would be a no-op
+    tmp_path = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(tmp_path)  # never copy into a stale link to a cached file
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dest)
+
+
+def _dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+class RenderCache:
+    def __init__(self, root: str = CACHE_DIR, max_mb: float = CACHE_MB):
+        self.root = root
+        self.max_bytes = int(max_mb * 2**20)
+        self._entries = None  # key -> bytes, least recently used first
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def key(self, kind: str, source_hash: str, params: dict) -> str:
+        return content_digest({"kind": kind, "source": source_hash, "params": params})
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def _load_index(self):
+        # oldest entry.json mtime first = LRU order
+        if self._entries is not None:
+            return
+        found = []
+        if os.path.isdir(self.root):
+            for shard in os.listdir(self.root):
+                shard_dir = os.path.join(self.root, shard)
+                if shard == "staging" or not os.path.isdir(shard_dir):
+                    continue  # renders in progress are not entries
+                for key in os.listdir(shard_dir):
+                    entry_dir = os.path.join(shard_dir, key)
+                    try:
+                        used = os.stat(os.path.join(entry_dir, "entry.json")).st_mtime
+                    except OSError:
+                        shutil.rmtree(entry_dir, ignore_errors=True)  # incomplete entry
+                        continue
+                    found.append((used, key, _dir_size(entry_dir)))
+        self._entries = OrderedDict((key, size) for _, key, size in sorted(found))
+        self._evict()  # the budget may have shrunk since the last run
+
+    def get(self, key: str):
+        """Entry metadata with absolute file paths, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._load_index()
+            if key not in self._entries:
+                self.stats["misses"] += 1
+                return None
+            entry_dir = self._entry_dir(key)
+            try:
+                with open(os.path.join(entry_dir, "entry.json")) as f:
+                    entry = json.load(f)
+                os.utime(os.path.join(entry_dir, "entry.json"))
+            except (OSError, ValueError):
+                self._entries.pop(key, None)
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+        entry["files"] = {name: os.path.join(entry_dir, f) for name, f in entry["files"].items()}
+        return entry
+
+    def staging_dir(self, key: str) -> str:
+        """Fresh directory to render an entry's files into before put()."""
+        path = os.path.join(self.root, "staging", f"{key}-{os.getpid()}-{threading.get_ident()}-{time.time_ns()}")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def put(self, key: str, staging: str, files: dict, meta: dict) -> dict:
+        """
+        Move a staging dir holding files {name: filename} into the cache as
+        the entry for key, evict down to budget and return the entry.
+        """
+        with open(os.path.join(staging, "entry.json"), "w") as f:
+            json.dump({**meta, "files": files, "created_at": time.time()}, f, indent=2)
+        entry_dir = self._entry_dir(key)
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+        with self._lock:
+            self._load_index()
+            if os.path.exists(os.path.join(entry_dir, "entry.json")):
+                # a concurrent request (or another process) rendered the same thing first
+                shutil.rmtree(staging, ignore_errors=True)
+            else:
+                shutil.rmtree(entry_dir, ignore_errors=True)  # incomplete leftover, if any
+                os.rename(staging, entry_dir)
+            # (re)index: the entry may exist on disk without being in this index
+            self._entries[key] = _dir_size(entry_dir)
+            self._entries.move_to_end(key)
+            self._evict(keep=key)
+        return {**meta, "files": {name: os.path.join(entry_dir, f) for name, f in files.items()}}
+
+    def _evict(self, keep: str = None):
+        total = sum(self._entries.values())
+        while total > self.max_bytes and self._entries:
+            key, size = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            self._entries.pop(key)
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            total -= size
+            self.stats["evictions"] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            self._load_index()
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "bytes": sum(self._entries.values()),
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,150 @@
+# mcp_servers/dv/plots.py
+"""
+Plot functions for the DV MCP.
+
+They use the object-oriented Agg API (a Figure per call, no pyplot), so
+there is no global figure state and they are safe to run concurrently in
+any thread or process.
+
+A figure is rasterized once. The full-size PNG and the thumbnail are
+both written from that one Agg buffer; the thumbnail is a downscale, not
+a second draw. The optional SVG is a vector draw of the same Figure
+object, so the plot data is only prepared once.
+"""
+import logging
+
+import numpy as np
+from PIL import Image
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DPI = 200
+THUMB_WIDTH = 320
+# Density mode: grid of the 2D histogram image and number of residual bands.
+DENSITY_BINS = 300
+BAND_BINS = 60
+BAND_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def new_figure(figsize) -> Figure:
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def save_figure(fig: Figure, out_path: str, dpi: int = DEFAULT_DPI, thumb_path: str = None,
+                svg_path: str = None, thumb_width: int = THUMB_WIDTH) -> dict:
+    """Write the full PNG and, if asked, a thumbnail PNG and an SVG; returns {variant: path}."""
+    fig.tight_layout()
+    fig.set_dpi(dpi)
+    fig.canvas.draw()
+    image = Image.frombuffer("RGBA", fig.canvas.get_width_height(physical=True), fig.canvas.buffer_rgba())
+    image.save(out_path, format="png", dpi=(dpi, dpi))
+    written = {"png": out_path}
+    if thumb_path:
+        thumb = image.convert("RGB")
+        thumb.thumbnail((thumb_width, thumb_width * 4), Image.LANCZOS)
+        thumb.save(thumb_path, format="png", optimize=True)
+        written["thumb"] = thumb_path
+    if svg_path:
+        fig.savefig(svg_path, format="svg")
+        written["svg"] = svg_path
+    logger.info("Saved plot: %s", ", ".join(written.values()))
+    return written
+
+
+def density_image(x: np.ndarray, y: np.ndarray, bins: int = DENSITY_BINS, lims=None):
+    """2D histogram of (x, y) over a square range; returns (counts.T, extent)."""
+    if lims is None:
+        lims = (min(x.min(), y.min()), max(x.max(), y.max()))
+        lims = (lims[0], lims[1] + 1e-9) if lims[0] == lims[1] else lims
+    counts, xedges, yedges = np.histogram2d(x, y, bins=bins, range=[lims, lims])
+    return counts.T, (xedges[0], xedges[-1], yedges[0], yedges[-1])
+
+
+def quantile_bands(x: np.ndarray, y: np.ndarray, bins: int = BAND_BINS, quantiles=BAND_QUANTILES):
+    """
+    Quantiles of y within equal-count bins of x, computed with one sort
+    (no Python loop over rows). Returns (bin centers, {q: values}).
+    """
+    edges = np.unique(np.quantile(x, np.linspace(0, 1, bins + 1)))
+    idx = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, len(edges) - 2)
+    order = np.lexsort((y, idx))
+    idx_sorted, y_sorted = idx[order], y[order]
+    counts = np.bincount(idx_sorted, minlength=len(edges) - 1)
+    present = counts > 0
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[present]
+    counts = counts[present]
+    bands = {q: y_sorted[starts + np.floor(q * (counts - 1)).astype(int)] for q in quantiles}
+    centers = ((edges[:-1] + edges[1:]) / 2)[present]
+    return centers, bands
+
+
+def plot_pred_vs_actual(y_true: np.ndarray, y_pred: np.ndarray, out_path: str, dpi: int = DEFAULT_DPI,
+                        mode: str = "scatter", **variants):
+    fig = new_figure((8, 6))
+    ax = fig.add_subplot()
+    min_val = min(y_true.min(), y_pred.min())
+    max_val = max(y_true.max(), y_pred.max())
+    if mode == "density":
+        counts, extent = density_image(y_true, y_pred)
+        image = ax.imshow(np.ma.masked_equal(counts, 0), origin="lower", extent=extent, aspect="auto",
+                          norm=LogNorm(), cmap="viridis", interpolation="nearest")
+        fig.colorbar(image, ax=ax, label="Points per bin")
+    else:
+        ax.scatter(y_true, y_pred, alpha=0.6)
+    ax.plot([min_val, max_val], [min_val, max_val], "r--", linewidth=1.5)
+    ax.set_xlabel("Actual")
+    ax.set_ylabel("Predicted")
+    ax.set_title("Predicted vs Actual")
+    ax.grid(True)
+    return save_figure(fig, out_path, dpi, **variants)
+
+
+def plot_residuals(y_true: np.ndarray, y_pred: np.ndarray, out_path: str, dpi: int = DEFAULT_DPI,
+                   mode: str = "scatter", **variants):
+    residual = y_true - y_pred
+    fig = new_figure((8, 5))
+    ax = fig.add_subplot()
+    if mode == "density":
+        centers, bands = quantile_bands(y_pred, residual)
+        ax.fill_between(centers, bands[0.05], bands[0.95], alpha=0.25, color="C0", label="5-95%")
+        ax.fill_between(centers, bands[0.25], bands[0.75], alpha=0.45, color="C0", label="25-75%")
+        ax.plot(centers, bands[0.5], color="C0", linewidth=1.5, label="Median")
+        ax.legend(loc="best")
+    else:
+        ax.scatter(y_pred, residual, alpha=0.6)
+    ax.axhline(0, color="r", linestyle="--")
+    ax.set_xlabel("Predicted")
+    ax.set_ylabel("Residual (Actual - Predicted)")
+    ax.set_title("Residuals vs Predicted")
+    ax.grid(True)
+    return save_figure(fig, out_path, dpi, **variants)
+
+
+def plot_feature_importances(importances, out_path: str, dpi: int = DEFAULT_DPI, **variants):
+    # importances expected list of (feature, importance)
+    if not importances:
+        raise ValueError("No feature importances provided")
+    feat_names, scores = zip(*importances)
+    fig = new_figure((8, max(4, len(feat_names) * 0.4)))
+    ax = fig.add_subplot()
+    ax.barh(feat_names, scores)
+    ax.set_xlabel("Importance")
+    ax.set_title("Feature Importances")
+    return save_figure(fig, out_path, dpi, **variants)
+
+
+PLOTS = {
+    "pred_vs_actual": plot_pred_vs_actual,
+    "residuals": plot_residuals,
+    "feature_importances": plot_feature_importances,
+}
+
+
+def render_plot(kind: str, args: tuple, out_path: str, dpi: int = DEFAULT_DPI, **options) -> dict:
+    """Worker entry point: render one plot kind; returns {variant: path} as save_figure does."""
+    return PLOTS[kind](*args, out_path, dpi=dpi, **options)
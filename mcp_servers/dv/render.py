@@ -0,0 +1,88 @@
+# mcp_servers/dv/render.py
+"""
+Process pool that renders plots off the event loop.
+
+Each plot is one task, so the plots of a request render in parallel and
+concurrent requests share the workers. Every task has a timeout. The pool
+counts tasks that are queued or running (queue depth) so the DV server
+can expose it as a metric.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from mcp_servers.dv.plots import render_plot
+
+logger = logging.getLogger(__name__)
+
+RENDER_WORKERS = int(os.getenv("DV_RENDER_WORKERS", min(4, os.cpu_count() or 1)))
+RENDER_TIMEOUT_S = float(os.getenv("DV_RENDER_TIMEOUT_S", 60))
+
+
+class RenderTimeout(Exception):
+    pass
+
+
+class RenderPool:
+    def __init__(self, workers: int = RENDER_WORKERS, timeout_s: float = RENDER_TIMEOUT_S):
+        self.workers = workers
+        self.timeout_s = timeout_s
+        self._executor = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "queue_depth": 0,      # tasks submitted and not finished
+            "max_queue_depth": 0,
+            "rendered": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "latency_s_total": 0.0,  # submit -> done, includes queueing
+        }
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            logger.info(f"Render pool started with {self.workers} workers")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _done(self, started: float, future):
+        with self._lock:
+            self.stats["queue_depth"] -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.stats["failures"] += 1
+            else:
+                self.stats["rendered"] += 1
+                self.stats["latency_s_total"] += time.perf_counter() - started
+
+    async def render(self, kind: str, args: tuple, out_path: str, timeout_s: float = None, **options) -> dict:
+        """Render one plot in the pool ({variant: path}); raises RenderTimeout after timeout_s."""
+        self.start()
+        with self._lock:
+            self.stats["queue_depth"] += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.stats["queue_depth"])
+        future = self._executor.submit(render_plot, kind, args, out_path, **options)
+        future.add_done_callback(lambda f, started=time.perf_counter(): self._done(started, f))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout_s or self.timeout_s)
+        except asyncio.TimeoutError:
+            # a task that already started keeps its worker until it finishes
+            future.cancel()
+            with self._lock:
+                self.stats["timeouts"] += 1
+            raise RenderTimeout(f"Rendering {kind} took longer than {timeout_s or self.timeout_s}s")
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        done = stats["rendered"] or 1
+        stats["avg_latency_s"] = round(stats.pop("latency_s_total") / done, 4)
+        stats["workers"] = self.workers
+        return stats
@@ -1,69 +1,102 @@
 # mcp_servers/mcp_dv.py
 import os
+import html
 import json
+import asyncio
 import logging
+import shutil
+import contextlib
+import aiofiles
+import aiofiles.os
 import pandas as pd
-import matplotlib.pyplot as plt
 from fastapi import FastAPI, HTTPException, Body
 from dotenv import load_dotenv
-from fastapi.responses import HTMLResponse
+from fastapi.responses import StreamingResponse
+
+from mcp_servers.dv.cache import RenderCache, file_digest, content_digest, place_file
+from mcp_servers.dv.plots import DEFAULT_DPI, THUMB_WIDTH
+from mcp_servers.dv.render import RenderPool, RenderTimeout
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
-app = FastAPI(title="Data Visualization MCP", version="1.0")
+# Plots render in worker processes; the event loop only reads inputs and awaits.
+render_pool = RenderPool()
+# Rendered plots keyed by input hash + kind + parameters; repeat views are links.
+render_cache = RenderCache()
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    render_pool.start()
+    yield
+    render_pool.shutdown()
+
+
+app = FastAPI(title="Data Visualization MCP", version="1.1", lifespan=lifespan)
 
 # defaults (env-overridable)
 #result_dir = os.getenv("DV_RESULTS_DIR", "./artifacts/dv_results")
 result_dir = os.getenv("DV_RESULTS_DIR", "./student_ui/static/resource")
 predictions_path_default = os.getenv("PREDICTION_PATH", "./artifacts/ml_results/predictions.csv")
 feature_importance_path = os.getenv("FEATURE_IMPORTANCE_PATH", "./artifacts/ml_results/feature_importances.json")
+# above this many predictions the scatter plots switch to density rendering
+density_threshold = int(os.getenv("DV_DENSITY_THRESHOLD", 50000))
+# /visualize/userresults reads HTML resources in pieces of this many characters
+STREAM_CHUNK_CHARS = int(os.getenv("DV_STREAM_CHUNK_KB", 64)) * 1024
 
 os.makedirs(result_dir, exist_ok=True)
 
-def plot_pred_vs_actual(df: pd.DataFrame, out_path: str):
-    plt.figure(figsize=(8, 6))
-    plt.scatter(df["y_true"], df["y_pred"], alpha=0.6)
-    min_val = min(df["y_true"].min(), df["y_pred"].min())
-    max_val = max(df["y_true"].max(), df["y_pred"].max())
-    plt.plot([min_val, max_val], [min_val, max_val], 'r--', linewidth=1.5)
-    plt.xlabel("Actual")
-    plt.ylabel("Predicted")
-    plt.title("Predicted vs Actual")
-    plt.grid(True)
-    plt.tight_layout()
-    plt.savefig(out_path, dpi=200)
-    plt.close()
-    logger.info("Saved plot: %s", out_path)
-
-def plot_residuals(df: pd.DataFrame, out_path: str):
-    df["residual"] = df["y_true"] - df["y_pred"]
-    plt.figure(figsize=(8, 5))
-    plt.scatter(df["y_pred"], df["residual"], alpha=0.6)
-    plt.axhline(0, color='r', linestyle='--')
-    plt.xlabel("Predicted")
-    plt.ylabel("Residual (Actual - Predicted)")
-    plt.title("Residuals vs Predicted")
-    plt.grid(True)
-    plt.tight_layout()
-    plt.savefig(out_path, dpi=200)
-    plt.close()
-    logger.info("Saved plot: %s", out_path)
-
-def plot_feature_importances(importances, out_path: str):
-    # importances expected list of (feature, importance)
-    if not importances:
-        raise ValueError("No feature importances provided")
-    feat_names, scores = zip(*importances)
-    plt.figure(figsize=(8, max(4, len(feat_names) * 0.4)))
-    plt.barh(feat_names, scores)
-    plt.xlabel("Importance")
-    plt.title("Feature Importances")
-    plt.tight_layout()
-    plt.savefig(out_path, dpi=200)
-    plt.close()
-    logger.info("Saved plot: %s", out_path)
+
+def load_feature_importances(feature_importances):
+    """Inline list of [feat, score] or, failing that, the ML server's FEATURE_IMPORTANCE_PATH."""
+    if feature_importances:
+        return feature_importances
+    if not os.path.exists(feature_importance_path):
+        return None
+    try:
+        with open(feature_importance_path, "r") as f:
+            fi = json.load(f)
+        # allow either dict or list-of-pairs
+        if isinstance(fi, dict) and "feature_importances" in fi:
+            return fi["feature_importances"]
+        return fi
+    except Exception as e:
+        logger.warning("Could not load default feature_importances: %s", e)
+        return None
+
+# cache entry file name and result-dir suffix of every plot variant
+VARIANT_FILES = {"png": "plot.png", "thumb": "thumb.png", "svg": "plot.svg"}
+VARIANT_SUFFIXES = {"png": ".png", "thumb": "_thumb.png", "svg": ".svg"}
+
+
+async def render_to(kind: str, key: str, args: tuple, dests: dict, meta: dict, **options):
+    """
+    Render one plot's variants ({variant: dest path}) into the cache entry
+    for key and place them at their destinations (no cache: render to dests).
+    """
+    if not render_cache.enabled:
+        await render_pool.render(kind, args, dests["png"], thumb_path=dests.get("thumb"),
+                                 svg_path=dests.get("svg"), **options)
+        return
+    staging = await asyncio.to_thread(render_cache.staging_dir, key)
+    files = {v: VARIANT_FILES[v] for v in dests}
+    staged = {v: os.path.join(staging, f) for v, f in files.items()}
+    try:
+        await render_pool.render(kind, args, staged["png"], thumb_path=staged.get("thumb"),
+                                 svg_path=staged.get("svg"), **options)
+        entry = await asyncio.to_thread(render_cache.put, key, staging, files, meta)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    await place_files(entry, dests)
+
+
+async def place_files(entry: dict, dests: dict):
+    """Link a cache entry's variant files to their destinations."""
+    await asyncio.gather(*(asyncio.to_thread(place_file, entry["files"][v], dest) for v, dest in dests.items()))
+
 
 @app.post("/visualize/results")
 async def visualize_results(
@@ -76,57 +109,82 @@ async def visualize_results(
         predictions_path = payload.get("predictions_path") or predictions_path_default
         feature_importances = payload.get("feature_importances")  # optional
         save_prefix = payload.get("save_prefix", "pred_vs_actual")
+        requested_mode = payload.get("render_mode") or "auto"
+        if requested_mode not in ("auto", "scatter", "density"):
+            raise HTTPException(status_code=400, detail=f"Unknown render_mode '{requested_mode}'")
+        dpi = int(payload.get("dpi", DEFAULT_DPI))
+        # thumbnail + full PNG always; the SVG only on request
+        variants = ["thumb", "png"] + (["svg"] if payload.get("svg") else [])
 
         if not os.path.exists(predictions_path):
             raise FileNotFoundError(f"Predictions CSV not found at {predictions_path}")
 
-        df = pd.read_csv(predictions_path)
-        if not {"y_true", "y_pred"}.issubset(df.columns):
-            raise ValueError("predictions CSV must contain columns 'y_true' and 'y_pred'")
+        # cache keys: input content + plot kind + render parameters
+        data_hash = await asyncio.to_thread(file_digest, predictions_path)
+        fi_list = await asyncio.to_thread(load_feature_importances, feature_importances)
+        keys = {
+            kind: render_cache.key(kind, data_hash, {"dpi": dpi, "mode": requested_mode, "threshold": density_threshold,
+                                                     "variants": variants, "thumb_width": THUMB_WIDTH})
+            for kind in ("pred_vs_actual", "residuals")
+        }
+        if fi_list:
+            keys["feature_importances"] = render_cache.key("feature_importances", content_digest(fi_list), {
+                "dpi": dpi, "variants": variants, "thumb_width": THUMB_WIDTH})
+        cached = {kind: await asyncio.to_thread(render_cache.get, key) for kind, key in keys.items()}
 
         # ensure results dir exists
         os.makedirs(result_dir, exist_ok=True)
+        paths = {
+            kind: {v: os.path.join(result_dir, f"{save_prefix}_{kind}{VARIANT_SUFFIXES[v]}") for v in variants}
+            for kind in keys
+        }
 
-        # plot 1: predicted vs actual
-        pvap = os.path.join(result_dir, f"{save_prefix}_pred_vs_actual.png")
-        plot_pred_vs_actual(df, pvap)
-
-        # plot 2: residuals
-        residp = os.path.join(result_dir, f"{save_prefix}_residuals.png")
-        plot_residuals(df, residp)
-
-        # plot 3: feature importances (if provided inline or in ml_results)
-        fi_path = None
-        if feature_importances:
-            # accept inline list of [feat,score]
-            fi_path = os.path.join(result_dir, f"{save_prefix}_feature_importances.png")
-            plot_feature_importances(feature_importances, fi_path)
-        else:
-            # try to read from default ml_results feature importances file
-            if os.path.exists(feature_importance_path):
-                try:
-                    with open(feature_importance_path, "r") as f:
-                        fi = json.load(f)
-                    # allow either dict or list-of-pairs
-                    if isinstance(fi, dict) and "feature_importances" in fi:
-                        fi_list = fi["feature_importances"]
-                    else:
-                        fi_list = fi
-                    if fi_list:
-                        fi_path = os.path.join(result_dir, f"{save_prefix}_feature_importances.png")
-                        plot_feature_importances(fi_list, fi_path)
-                except Exception as e:
-                    logger.warning("Could not load default feature_importances: %s", e)
+        # the CSV is only read when a data plot has to be rendered
+        data_meta = cached["pred_vs_actual"] or cached["residuals"]
+        y_true = y_pred = None
+        if cached["pred_vs_actual"] is None or cached["residuals"] is None:
+            df = await asyncio.to_thread(pd.read_csv, predictions_path)
+            if not {"y_true", "y_pred"}.issubset(df.columns):
+                raise ValueError("predictions CSV must contain columns 'y_true' and 'y_pred'")
+            y_true = df["y_true"].to_numpy(dtype=float)
+            y_pred = df["y_pred"].to_numpy(dtype=float)
+            render_mode = requested_mode
+            if render_mode == "auto":
+                render_mode = "density" if len(df) > density_threshold else "scatter"
+            data_meta = {"data_points": int(len(df)), "render_mode": render_mode}
+
+        # cache hits are linked into place; misses render in parallel in the pool
+        jobs = []
+        for kind in keys:
+            if cached[kind]:
+                jobs.append(place_files(cached[kind], paths[kind]))
+            elif kind == "feature_importances":
+                jobs.append(render_to(kind, keys[kind], (fi_list,), paths[kind], {}, dpi=dpi))
+            else:
+                jobs.append(render_to(kind, keys[kind], (y_true, y_pred), paths[kind], data_meta,
+                                      dpi=dpi, mode=data_meta["render_mode"]))
+        results = dict(zip(keys, await asyncio.gather(*jobs, return_exceptions=True)))
+        for kind in ("pred_vs_actual", "residuals"):
+            if isinstance(results[kind], BaseException):
+                raise results[kind]
+        if "feature_importances" in paths and isinstance(results["feature_importances"], BaseException):
+            # the importance plot is optional; a bad list doesn't fail the request
+            logger.warning("Could not plot feature importances: %s", results["feature_importances"])
+            del paths["feature_importances"]
 
         # save summary
         summary = {
             "status": "success",
             "plots": {
-                "pred_vs_actual": pvap,
-                "residuals": residp,
-                "feature_importances": fi_path
+                "pred_vs_actual": paths["pred_vs_actual"]["png"],
+                "residuals": paths["residuals"]["png"],
+                "feature_importances": paths.get("feature_importances", {}).get("png")
             },
-            "data_points": int(len(df)),
+            # cheapest first: thumb (preview), png (full size), svg (if requested)
+            "variants": paths,
+            "data_points": data_meta["data_points"],
+            "render_mode": data_meta["render_mode"],
+            "cache_hits": [kind for kind in keys if cached[kind]],
             "predictions_path": predictions_path
         }
         summary_path = os.path.join(result_dir, f"{save_prefix}_summary.json")
@@ -136,92 +194,98 @@ async def visualize_results(
         logger.info("Visualization complete. Summary saved: %s", summary_path)
         return summary
 
+    except HTTPException:
+        raise
+    except RenderTimeout as e:
+        logger.error("Visualization timed out: %s", e)
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.exception("Visualization failed")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/visualize/userresults")
-async def visualize_results(payload: dict = Body(default={})):
-    try:
-        if "files" not in payload:
-            raise HTTPException(status_code=400, detail="Payload must include 'files'")
+@app.get("/metrics/render")
+async def render_metrics():
+    """Render pool queue depth and counters, plus render cache usage."""
+    return {**render_pool.metrics(), "cache": await asyncio.to_thread(render_cache.metrics)}
 
-        file_names = payload["files"]
-        combined_html_parts = []
-
-        for name in file_names:
-            file_path = os.path.join(result_dir, name)
-
-            if not os.path.exists(file_path):
-                combined_html_parts.append(
-                    f"<div style='color:red'>⚠ File not found: {file_path}</div>"
-                )
-                continue
-
-            ext = os.path.splitext(name)[1].lower()
-
-            # ---------------------------
-            # HTML FILE
-            # ---------------------------
-            if ext in [".html", ".htm"]:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
-
-                wrapped = f"""
-                <section style="margin-bottom:30px; padding:20px; border:1px solid #ccc; border-radius:8px;">
-                    <h2>HTML Resource: {name}</h2>
-                    <div>{content}</div>
-                </section>
-                """
-                combined_html_parts.append(wrapped)
-
-            # ---------------------------
-            # PDF FILE
-            # ---------------------------
-            elif ext == ".pdf":
-                wrapped = f"""
-                <section style="margin-bottom:30px; padding:20px; border:1px solid #ccc; border-radius:8px;">
-                    <h2>PDF Resource: {name}</h2>
-                    <embed src="/static/{name}"
-                           type="application/pdf"
-                           width="100%" height="800px" />
-                </section>
-                """
-                combined_html_parts.append(wrapped)
-
-            else:
-                combined_html_parts.append(
-                    f"<p style='color:orange'>Unsupported file type: {name}</p>"
-                )
-
-        final_page = f"""
+# --------------------------------------------------------------------
+# User Results (streamed)
+# --------------------------------------------------------------------
+USERRESULTS_HEAD = """
         <html>
         <head>
             <title>Combined Resource Visualization</title>
             <style>
-                body {{
+                body {
                     font-family: Arial, sans-serif;
                     margin: 20px;
                     background: #f7f7f7;
-                }}
-                h1 {{
+                }
+                h1 {
                     text-align: center;
                     margin-bottom: 40px;
-                }}
+                }
             </style>
         </head>
         <body>
             <h1>Visualization Results</h1>
-            {''.join(combined_html_parts)}
+"""
+USERRESULTS_TAIL = """
         </body>
         </html>
-        """
+"""
+SECTION_OPEN = """
+                <section style="margin-bottom:30px; padding:20px; border:1px solid #ccc; border-radius:8px;">
+"""
+SECTION_CLOSE = """
+                </section>
+"""
+
+
+async def stream_user_results(file_names: list):
+    """
+    Yield the combined page piece by piece: header, one section per file
+    (HTML bodies are read from disk in STREAM_CHUNK_CHARS pieces), footer.
+    At most one chunk of one file is held in memory at a time.
+    """
+    yield USERRESULTS_HEAD
+    for name in file_names:
+        file_path = os.path.join(result_dir, name)
+        if not await aiofiles.os.path.isfile(file_path):
+            yield f"<div style='color:red'>⚠ File not found: {html.escape(file_path)}</div>"
+            continue
+
+        ext = os.path.splitext(name)[1].lower()
+        if ext in [".html", ".htm"]:
+            yield SECTION_OPEN + f"<h2>HTML Resource: {html.escape(name)}</h2>\n<div>"
+            try:
+                async with aiofiles.open(file_path, "r", encoding="utf-8", errors="replace") as f:
+                    while chunk := await f.read(STREAM_CHUNK_CHARS):
+                        yield chunk
+            except OSError as e:
+                # headers are already sent; report the failure inside the page
+                logger.warning("Could not stream %s: %s", file_path, e)
+                yield f"<div style='color:red'>⚠ Could not read {html.escape(name)}</div>"
+            yield "</div>" + SECTION_CLOSE
+        elif ext == ".pdf":
+            src = html.escape(f"/static/{name}", quote=True)
+            yield (SECTION_OPEN + f"<h2>PDF Resource: {html.escape(name)}</h2>\n"
+                   f'<embed src="{src}" type="application/pdf" width="100%" height="800px" />' + SECTION_CLOSE)
+        else:
+            yield f"<p style='color:orange'>Unsupported file type: {html.escape(name)}</p>"
+    yield USERRESULTS_TAIL
 
-        return HTMLResponse(content=final_page, status_code=200)
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    
+@app.post("/visualize/userresults")
+async def visualize_user_results(payload: dict = Body(default={})):
+    """Combine the requested result files into one page, streamed as it is read."""
+    if "files" not in payload:
+        raise HTTPException(status_code=400, detail="Payload must include 'files'")
+    file_names = payload["files"]
+    if not isinstance(file_names, list) or not all(isinstance(n, str) for n in file_names):
+        raise HTTPException(status_code=400, detail="'files' must be a list of file names")
+    return StreamingResponse(stream_user_results(file_names), media_type="text/html; charset=utf-8")
+
 
 if __name__ == "__main__":
     import uvicorn
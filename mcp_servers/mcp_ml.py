@@ -1,17 +1,19 @@
 import os
 import json
 import logging
-import joblib
-import pandas as pd
+import contextlib
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import (
-    root_mean_squared_error,
-    mean_absolute_error,
-    r2_score,
-)
+from fastapi import FastAPI, HTTPException, Body
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from mcp_servers.ml.jobs import JobManager
+from mcp_servers.ml.pipeline import run_training, dataset_stamp
+from mcp_servers.ml.search import run_search, search_params
+from mcp_servers.ml.incremental import run_retrain
+from mcp_servers.ml.cv import run_cv
+from mcp_servers.ml.registry import ModelRegistry
+from mcp_servers.ml.predictor import Predictor
 
 # --------------------------------------------------------------------
 # Setup
@@ -20,100 +22,55 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
-app = FastAPI(title="ML MCP Server", version="1.1")
+# Active model kept in memory for /predict; follows the registry's ACTIVE pointer.
+registry = ModelRegistry()
+predictor = Predictor(registry)
+
+
+def activate_result(result: dict):
+    """Jobs register their model inactive; only a job that succeeded is activated."""
+    if result.get("model_version"):
+        registry.activate(result["model_version"])
+
+
+# Training runs in worker processes; the event loop only submits and awaits.
+job_manager = JobManager()
+job_manager.register("train", run_training, fingerprint=dataset_stamp, on_success=activate_result)
+job_manager.register("search", run_search, fingerprint=dataset_stamp, on_success=activate_result)
+job_manager.register("retrain", run_retrain, fingerprint=dataset_stamp, on_success=activate_result)
+job_manager.register("cv", run_cv, fingerprint=dataset_stamp)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_manager.start()
+    await predictor.start()
+    yield
+    await predictor.stop()
+    job_manager.shutdown()
 
-# --------------------------------------------------------------------
-# Utility Functions
-# --------------------------------------------------------------------
-def load_dataset() -> pd.DataFrame:
-    """Load the processed dataset."""
-    data_path = os.getenv("DATA_PROCESSED_PATH", "./processed/processed_data.csv")
-    if not os.path.exists(data_path):
-        raise FileNotFoundError(f"Processed data not found at {data_path}")
-    df = pd.read_csv(data_path)
-    logger.info(f"✅ Loaded dataset: {df.shape[0]} rows, {df.shape[1]} columns")
-    return df
-
-
-def train_random_forest(X_train, y_train) -> RandomForestRegressor:
-    """Train the RandomForest model."""
-    model = RandomForestRegressor(random_state=42, n_estimators=200)
-    model.fit(X_train, y_train)
-    logger.info("✅ RandomForest training complete.")
-    return model
-
-
-def evaluate_model(model, X_test, y_test) -> dict:
-    """Compute evaluation metrics."""
-    y_pred = model.predict(X_test)
-
-    metrics = {
-        "RMSE": round(float(root_mean_squared_error(y_test, y_pred)), 4),
-        "MAE": round(float(mean_absolute_error(y_test, y_pred)), 4),
-        "R2": round(float(r2_score(y_test, y_pred)), 4),
-    }
-
-    logger.info(f"📊 Model metrics: {json.dumps(metrics, indent=2)}")
-    return metrics, y_pred
-
-
-def save_artifacts(model, y_test, y_pred, X_train, X_test, metrics) -> dict:
-    """Save model, metrics, and predictions to artifacts directory."""
-    model_path = os.getenv("MODEL_PATH", "./models/random_forest.pkl")
-    result_dir = "./artifacts/ml_results"
-    os.makedirs(result_dir, exist_ok=True)
-    os.makedirs(os.path.dirname(model_path), exist_ok=True)
-
-    # Save model
-    joblib.dump(model, model_path)
-    logger.info(f"💾 Model saved at {model_path}")
-
-    # Save predictions
-    pred_path = os.path.join(result_dir, "predictions.csv")
-    pd.DataFrame({"y_true": y_test, "y_pred": y_pred}).to_csv(pred_path, index=False)
-    logger.info(f"💾 Predictions saved at {pred_path}")
-
-    # Save metrics
-    metrics_path = os.path.join(result_dir, "metrics.json")
-    with open(metrics_path, "w") as f:
-        json.dump(metrics, f, indent=2)
-    logger.info(f"💾 Metrics saved at {metrics_path}")
-
-    return {
-        "status": "success",
-        "metrics": metrics,
-        "train_rows": len(X_train),
-        "test_rows": len(X_test),
-        "model_path": model_path,
-        "predictions_path": pred_path,
-        "metrics_path": metrics_path,
-        "result_path": result_dir,
-    }
+
+app = FastAPI(title="ML MCP Server", version="1.2", lifespan=lifespan)
+
+
+async def run_job_and_wait(kind: str, params: dict = None) -> dict:
+    """Submit a job and await its result (the loop stays free meanwhile)."""
+    job = job_manager.submit(kind, params)
+    job = await job_manager.wait(job["id"])
+    if job["status"] != "succeeded":
+        raise RuntimeError(job.get("error") or f"Job {job['id']} {job['status']}")
+    return job["result"]
 
 
 # --------------------------------------------------------------------
 # API Endpoint
 # --------------------------------------------------------------------
 @app.post("/critic")
-async def train_model():
+async def critic():
     """MCP to run critic"""
     try:
         logger.info("🚀 Starting model training process...")
-        target_col = os.getenv("TARGET_COLUMN", "target")
-
-        df = load_dataset()
-        if target_col not in df.columns:
-            raise ValueError(f"Target column '{target_col}' not found in dataset.")
-
-        X = df.drop(columns=[target_col])
-        y = df[target_col]
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
-
-        model = train_random_forest(X_train, y_train)
-        metrics, y_pred = evaluate_model(model, X_test, y_test)
-        result = save_artifacts(model, y_test, y_pred, X_train, X_test, metrics)
+        result = await run_job_and_wait("train")
 
         logger.info("✅ Model training complete. Returning result summary.")
         logger.info(json.dumps(result, indent=2))
@@ -127,25 +84,11 @@ async def train_model():
 # API Endpoint
 # --------------------------------------------------------------------
 @app.post("/model/train")
-async def train_model():
+async def train_model(payload: dict = Body(default={})):
     """Main training pipeline for RandomForest."""
     try:
         logger.info("🚀 Starting model training process...")
-        target_col = os.getenv("TARGET_COLUMN", "target")
-
-        df = load_dataset()
-        if target_col not in df.columns:
-            raise ValueError(f"Target column '{target_col}' not found in dataset.")
-
-        X = df.drop(columns=[target_col])
-        y = df[target_col]
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
-
-        model = train_random_forest(X_train, y_train)
-        metrics, y_pred = evaluate_model(model, X_test, y_test)
-        result = save_artifacts(model, y_test, y_pred, X_train, X_test, metrics)
+        result = await run_job_and_wait("train", payload.get("params"))
 
         logger.info("✅ Model training complete. Returning result summary.")
         logger.info(json.dumps(result, indent=2))
@@ -156,6 +99,141 @@ async def train_model():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/model/retrain")
+async def retrain_model(payload: dict = Body(default={})):
+    """
+    Incremental retrain after rows were appended to the dataset:
+    {"params": {"strategy": "warm_start" | "rolling", ...}}. Falls back to a
+    full retrain when the dataset was not just appended to.
+    """
+    try:
+        logger.info("🚀 Starting incremental retrain...")
+        result = await run_job_and_wait("retrain", payload.get("params"))
+        logger.info(f"✅ Retrain complete: {json.dumps(result.get('incremental'))}")
+        return result
+
+    except Exception as e:
+        logger.exception("Model retrain failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/model/cv")
+async def cross_validate(payload: dict = Body(default={})):
+    """K-fold cross-validation: {"params": {"k": 5, ...}}. Folds run in parallel."""
+    try:
+        logger.info("🚀 Starting cross-validation...")
+        return await run_job_and_wait("cv", payload.get("params"))
+
+    except Exception as e:
+        logger.exception("Cross-validation failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/model/search", status_code=202)
+async def search_model(payload: dict = Body(default={})):
+    """
+    Successive-halving search: {"params": {"space": {...}, "factor": 3, ...}}.
+    Returns the job record (202); rung results appear in GET /jobs/{id} progress.
+    With "wait": true the call blocks until the best model is registered and
+    returns the finished result (200).
+    """
+    try:
+        search_params(payload.get("params"))
+        if payload.get("wait"):
+            result = await run_job_and_wait("search", payload.get("params"))
+            return JSONResponse(jsonable_encoder(result), status_code=200)
+        return job_manager.submit("search", payload.get("params"))
+    except (ValueError, FileNotFoundError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Hyperparameter search failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# --------------------------------------------------------------------
+# Job API
+# --------------------------------------------------------------------
+@app.post("/jobs", status_code=202)
+async def submit_job(payload: dict = Body(default={})):
+    """Queue a job: {"kind": "train", "params": {...}}. Returns the job record."""
+    try:
+        return job_manager.submit(payload.get("kind", "train"), payload.get("params"))
+    except (ValueError, FileNotFoundError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/jobs")
+async def list_jobs():
+    return job_manager.list()
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    try:
+        return job_manager.get(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    try:
+        job = job_manager.get(job_id, with_progress=False)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job['status']}: {job.get('error')}")
+    return job["result"]
+
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    try:
+        return job_manager.cancel(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+
+# --------------------------------------------------------------------
+# Model Registry / Serving
+# --------------------------------------------------------------------
+@app.get("/models")
+async def list_models():
+    return {"active": registry.active_version(), "versions": registry.versions()}
+
+
+@app.post("/models/{version}/activate")
+async def activate_model(version: str):
+    """Hot-swap /predict to another version; the old one serves until the new one is loaded."""
+    try:
+        registry.get(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model {version} not found")
+    await predictor.load(version)
+    registry.activate(version)
+    return {"active": version}
+
+
+@app.post("/predict")
+async def predict(payload: dict = Body(default={})):
+    """{"rows": [{feature: value, ...}, ...]} or lists in training column order."""
+    rows = payload.get("rows")
+    if not rows:
+        raise HTTPException(status_code=400, detail="Payload must include non-empty 'rows'")
+    try:
+        version, predictions = await predictor.predict(rows)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"model_version": version, "predictions": predictions}
+
+
+@app.get("/predict/stats")
+async def predict_stats():
+    return {"model_version": predictor.current.version if predictor.current else None, **predictor.stats}
+
+
 # --------------------------------------------------------------------
 # Main Entrypoint
 # --------------------------------------------------------------------
@@ -0,0 +1,257 @@
+# mcp_servers/ml/dataset_cache.py
+"""
+Columnar cache for the processed dataset.
+
+The CSV is parsed once and stored as one .npy file per column, downcast to
+the smallest dtype that round-trips exactly. Later loads memory-map those
+files, so repeated trainings skip text parsing and only touch the pages
+they read.
+
+Layout under DATASET_CACHE_DIR:
+
+    sources/<path-key>.json     path, size, mtime_ns -> sha256 of the CSV
+    <sha256[:16]>/manifest.json column names, dtypes, files, row count
+    <sha256[:16]>/c0000.npy ... one array per column
+
+Entries are keyed by content hash, so a touched-but-unchanged file reuses
+its cache and two paths with the same contents share one entry.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("DATASET_CACHE_DIR", "./artifacts/dataset_cache")
+CACHE_FORMAT = 1
+
+
+# --------------------------------------------------------------------
+# Source Fingerprints
+# --------------------------------------------------------------------
+def _write_json(path: str, data: dict):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_fingerprint(path: str, cache_dir: str = None) -> str:
+    """
+    SHA-256 of a source file. The hash is remembered on disk against the
+    file's size and mtime, so it is only recomputed when the file changes.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Processed data not found at {path}")
+    abs_path = os.path.abspath(path)
+    st = os.stat(abs_path)
+    pointer_path = os.path.join(
+        cache_dir, "sources", hashlib.sha1(abs_path.encode()).hexdigest()[:16] + ".json"
+    )
+    try:
+        with open(pointer_path) as f:
+            pointer = json.load(f)
+        if pointer["size"] == st.st_size and pointer["mtime_ns"] == st.st_mtime_ns:
+            return pointer["sha256"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    sha256 = _hash_file(abs_path)
+    os.makedirs(os.path.dirname(pointer_path), exist_ok=True)
+    _write_json(pointer_path, {
+        "path": abs_path, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha256,
+    })
+    return sha256
+
+
+# --------------------------------------------------------------------
+# Dtype Downcasting
+# --------------------------------------------------------------------
+def _downcast(series: pd.Series):
+    """Return (array, column spec) using the smallest lossless dtype."""
+    spec = {"name": str(series.name)}
+
+    if pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=bool), {**spec, "kind": "bool"}
+
+    if pd.api.types.is_integer_dtype(series):
+        values = pd.to_numeric(series, downcast="integer").to_numpy()
+        return values, {**spec, "kind": "int"}
+
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy(dtype=np.float64)
+        as32 = values.astype(np.float32)
+        if np.array_equal(as32.astype(np.float64), values, equal_nan=True):
+            values = as32
+        return values, {**spec, "kind": "float"}
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.to_numpy(dtype="datetime64[ns]").view(np.int64), {**spec, "kind": "datetime"}
+
+    # strings / mixed: integer codes plus the category list in the manifest
+    categorical = pd.Categorical(series)
+    codes = pd.to_numeric(pd.Series(categorical.codes), downcast="integer").to_numpy()
+    return codes, {**spec, "kind": "category", "categories": [str(c) for c in categorical.categories]}
+
+
+# --------------------------------------------------------------------
+# Cached Dataset
+# --------------------------------------------------------------------
+class CachedDataset:
+    """Memory-mapped view of a converted dataset."""
+
+    def __init__(self, entry_dir: str, mmap: bool = True):
+        self.entry_dir = entry_dir
+        with open(os.path.join(entry_dir, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self.sha256 = self.manifest["sha256"]
+        self.n_rows = self.manifest["rows"]
+        self.columns = [c["name"] for c in self.manifest["columns"]]
+        self._specs = {c["name"]: c for c in self.manifest["columns"]}
+        self._mmap_mode = "r" if mmap else None
+        self._arrays = {}
+
+    def raw(self, name: str) -> np.ndarray:
+        """Stored array for a column (codes for categoricals, int64 for datetimes)."""
+        if name not in self._specs:
+            raise KeyError(f"Column '{name}' not found in dataset.")
+        if name not in self._arrays:
+            path = os.path.join(self.entry_dir, self._specs[name]["file"])
+            self._arrays[name] = np.load(path, mmap_mode=self._mmap_mode)
+        return self._arrays[name]
+
+    def column(self, name: str) -> pd.Series:
+        """A column with its original pandas dtype restored."""
+        spec, values = self._specs[name], self.raw(name)
+        if spec["kind"] == "category":
+            values = pd.Categorical.from_codes(np.asarray(values), spec["categories"])
+        elif spec["kind"] == "datetime":
+            values = np.asarray(values).view("datetime64[ns]")
+        return pd.Series(values, name=name)
+
+    def frame(self, columns: list = None) -> pd.DataFrame:
+        return pd.DataFrame({name: self.column(name) for name in (columns or self.columns)})
+
+    def matrix(self, columns: list, dtype=np.float32, rows=None) -> np.ndarray:
+        """
+        Dense (rows, len(columns)) matrix filled column by column from the
+        memory-mapped files; `rows` (slice or index array) limits it to a
+        subset. Categorical (string) columns are rejected: their codes
+        follow the sorted category list, so they are neither ordinal nor
+        stable across versions of the dataset.
+        """
+        categorical = [name for name in columns if self._specs[name]["kind"] == "category"]
+        if categorical:
+            raise ValueError(f"Non-numeric feature columns: {categorical}; encode them before training")
+        rows = slice(None) if rows is None else rows
+        n_rows = len(range(self.n_rows)[rows]) if isinstance(rows, slice) else len(rows)
+        X = np.empty((n_rows, len(columns)), dtype=dtype)
+        for j, name in enumerate(columns):
+            X[:, j] = self.raw(name)[rows]
+        return X
+
+
+def _convert(source: str, sha256: str, entry_dir: str):
+    """Parse the CSV once and write the columnar entry atomically."""
+    started = time.perf_counter()
+    df = pd.read_csv(source)
+    tmp_dir = tempfile.mkdtemp(prefix=".convert-", dir=os.path.dirname(entry_dir))
+    try:
+        specs = []
+        for i, name in enumerate(df.columns):
+            values, spec = _downcast(df[name])
+            spec.update(file=f"c{i:04d}.npy", dtype=str(values.dtype))
+            np.save(os.path.join(tmp_dir, spec["file"]), np.ascontiguousarray(values))
+            specs.append(spec)
+        _write_json(os.path.join(tmp_dir, "manifest.json"), {
+            "format": CACHE_FORMAT,
+            "source": os.path.abspath(source),
+            "sha256": sha256,
+            "rows": int(df.shape[0]),
+            "columns": specs,
+            "csv_bytes": os.path.getsize(source),
+            "cache_bytes": sum(os.path.getsize(os.path.join(tmp_dir, s["file"])) for s in specs),
+            "created_at": time.time(),
+        })
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # another process finished the same conversion first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    logger.info(
+        f"🗂️ Cached {source} as {len(df.columns)} columns in {entry_dir} "
+        f"({time.perf_counter() - started:.2f}s)"
+    )
+
+
+def cached_manifest(sha256: str, cache_dir: str = None):
+    """Manifest of the converted entry for a dataset hash, or None if it isn't cached."""
+    manifest_path = os.path.join(cache_dir or CACHE_DIR, sha256[:16], "manifest.json")
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def category_lists(manifest: dict) -> dict:
+    """{column: categories} for the categorical columns of a manifest."""
+    return {c["name"]: c["categories"] for c in manifest["columns"] if c["kind"] == "category"}
+
+
+def appended_rows(previous_hash: str, path: str, cache_dir: str = None):
+    """
+    Number of rows the dataset had at previous_hash if the current file is
+    that file with rows appended, else None. Only the old prefix is hashed.
+    """
+    previous = cached_manifest(previous_hash, cache_dir)
+    if previous is None:
+        return None
+    old_bytes = previous.get("csv_bytes", 0)
+    if previous["sha256"] != previous_hash or os.path.getsize(path) < old_bytes:
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        remaining = old_bytes
+        while remaining:
+            block = f.read(min(1 << 20, remaining))
+            if not block:
+                return None
+            digest.update(block)
+            remaining -= len(block)
+    if digest.hexdigest() != previous_hash:
+        return None
+    return previous["rows"]
+
+
+def open_dataset(path: str, cache_dir: str = None, mmap: bool = True) -> CachedDataset:
+    """Open the columnar cache for a CSV, converting it on first use."""
+    cache_dir = cache_dir or CACHE_DIR
+    sha256 = source_fingerprint(path, cache_dir)
+    entry_dir = os.path.join(cache_dir, sha256[:16])
+    manifest_path = os.path.join(entry_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f).get("format") != CACHE_FORMAT:
+                shutil.rmtree(entry_dir, ignore_errors=True)
+    if not os.path.exists(manifest_path):
+        _convert(path, sha256, entry_dir)
+    return CachedDataset(entry_dir, mmap=mmap)
@@ -0,0 +1,136 @@
+# mcp_servers/ml/forest_pack.py
+"""
+Compact, array-backed export format for tree ensembles.
+
+All trees of a fitted RandomForestRegressor are concatenated into a few flat
+NumPy arrays (feature, threshold, children, value, ...), one ``.npy`` file
+each, plus a small meta.json. Loading memory-maps the files, so every worker
+that serves the same version shares the pages instead of holding its own
+unpickled copy.
+
+Leaves point to themselves as both children, so a leaf is simply a node
+whose left child is itself and the walk needs no per-tree branching.
+"""
+import os
+import json
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+ARRAYS = ("feature", "threshold", "children", "value", "roots", "missing_left")
+
+
+def pack_forest(model, out_dir: str, feature_names: list = None) -> str:
+    """Write a fitted forest regressor (single output) in packed form to out_dir."""
+    trees = [est.tree_ for est in model.estimators_]
+    if any(t.n_outputs != 1 for t in trees):
+        raise ValueError("Only single-output forests can be packed")
+
+    counts = np.array([t.node_count for t in trees], dtype=np.int64)
+    roots = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+    n_nodes = int(counts.sum())
+    index_dtype = np.int32 if n_nodes < np.iinfo(np.int32).max else np.int64
+    n_features = int(model.n_features_in_)
+    feature_dtype = np.int16 if n_features < np.iinfo(np.int16).max else np.int32
+
+    feature = np.empty(n_nodes, dtype=feature_dtype)
+    threshold = np.empty(n_nodes, dtype=np.float64)
+    children = np.empty((n_nodes, 2), dtype=index_dtype)
+    value = np.empty(n_nodes, dtype=np.float64)
+    missing_left = np.zeros(n_nodes, dtype=np.bool_)
+
+    for tree, offset, count in zip(trees, roots, counts):
+        sl = slice(offset, offset + count)
+        own = np.arange(offset, offset + count, dtype=index_dtype)
+        is_leaf = tree.children_left == -1
+        children[sl, 0] = np.where(is_leaf, own, tree.children_left + offset)
+        children[sl, 1] = np.where(is_leaf, own, tree.children_right + offset)
+        feature[sl] = np.where(is_leaf, 0, tree.feature)
+        threshold[sl] = np.where(is_leaf, np.inf, tree.threshold)
+        value[sl] = tree.value[:, 0, 0]
+        if hasattr(tree, "missing_go_to_left"):
+            missing_left[sl] = np.asarray(tree.missing_go_to_left, dtype=bool) & ~is_leaf
+
+    os.makedirs(out_dir, exist_ok=True)
+    arrays = {"feature": feature, "threshold": threshold, "children": children,
+              "value": value, "roots": roots, "missing_left": missing_left}
+    for name, arr in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), np.ascontiguousarray(arr))
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "n_trees": len(trees),
+        "n_nodes": n_nodes,
+        "n_features": n_features,
+        "max_depth": int(max(t.max_depth for t in trees)),
+        "feature_names": list(feature_names) if feature_names is not None else None,
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    logger.info(f"Packed {len(trees)} trees ({n_nodes} nodes) into {out_dir}")
+    return out_dir
+
+
+class PackedForest:
+    """Vectorized predictor over the packed arrays (memory-mapped by default)."""
+
+    def __init__(self, arrays: dict, meta: dict):
+        self.meta = meta
+        self.feature_names = meta.get("feature_names")
+        self.n_features = meta["n_features"]
+        self.max_depth = meta["max_depth"]
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self._has_missing = bool(np.any(self.missing_left))
+
+    def predict(self, X, chunk_rows: int = 4096) -> np.ndarray:
+        """
+        Mean of all trees' leaf values for a batch.
+
+        Rows are processed in chunks. Within a chunk every (tree, row) pair
+        advances one level per step, and pairs that reached a leaf drop out
+        of the active set, so shallow branches stop costing work early.
+        """
+        # same comparison as sklearn: float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected a 2D array with {self.n_features} features")
+
+        children = self.children.reshape(-1)  # left at 2*i, right at 2*i + 1
+        n_trees = len(self.roots)
+        n_features = self.n_features
+        out = np.empty(X.shape[0], dtype=np.float64)
+
+        for start in range(0, X.shape[0], chunk_rows):
+            flat_x = X[start:start + chunk_rows].reshape(-1)
+            m = len(flat_x) // n_features
+            nodes = np.repeat(self.roots.astype(children.dtype), m)  # tree-major (n_trees * m)
+            row_offset = np.tile(np.arange(m, dtype=np.intp) * n_features, n_trees)
+            active = np.arange(n_trees * m)
+            while active.size:
+                node = nodes[active]
+                x = flat_x[row_offset[active] + self.feature[node]]
+                go_right = ~(x <= self.threshold[node])
+                if self._has_missing:
+                    go_right &= ~(np.isnan(x) & self.missing_left[node])
+                child = children[2 * node + go_right]
+                nodes[active] = child
+                active = active[children[2 * child] != child]
+            out[start:start + m] = self.value[nodes].reshape(n_trees, m).mean(axis=0)
+        return out
+
+
+def load_packed(path: str, mmap: bool = True) -> PackedForest:
+    """Load a packed forest; with mmap=True arrays are shared read-only page-cache mappings."""
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    if meta.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported packed forest format {meta.get('format_version')}")
+    arrays = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+        for name in ARRAYS
+    }
+    return PackedForest(arrays, meta)
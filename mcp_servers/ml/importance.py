@@ -0,0 +1,199 @@
+# mcp_servers/ml/importance.py
+"""
+Feature importances written for the DV server's feature-importance plot.
+
+Impurity importances come for free from the fitted forest. Permutation
+importances are measured on a subsample of the test split: each feature
+is shuffled n_repeats times and the drop in R2 is recorded. Features are
+spread over a process pool, and a time budget stops the work. A feature
+whose budget runs out keeps the repeats it finished, and features that
+were never started are reported as skipped.
+
+The workers get the fitted model through a private joblib dump (memory
+mapped, so the tree arrays are shared), never through MODEL_PATH, which
+another job may overwrite meanwhile.
+"""
+import os
+import json
+import time
+import shutil
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+from sklearn.metrics import r2_score
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------
+# Configuration
+# --------------------------------------------------------------------
+# permutation: impurity + permutation; impurity: forest importances only; off
+IMPORTANCE_MODE = os.getenv("ML_IMPORTANCE", "permutation")
+IMPORTANCE_ROWS = int(os.getenv("ML_IMPORTANCE_ROWS", 2000))
+IMPORTANCE_REPEATS = int(os.getenv("ML_IMPORTANCE_REPEATS", 5))
+IMPORTANCE_BUDGET_S = float(os.getenv("ML_IMPORTANCE_BUDGET_S", 30))
+
+# Set in each worker by _init_worker: (model, X, y, baseline score).
+_state = None
+
+
+# --------------------------------------------------------------------
+# Worker side
+# --------------------------------------------------------------------
+def _init_worker(model_path: str, X: np.ndarray, y: np.ndarray, baseline: float):
+    global _state
+    threadpool_limits(limits=1)
+    # mmap: the tree arrays are shared with the other workers
+    model = joblib.load(model_path, mmap_mode="r")
+    if hasattr(model, "n_jobs"):
+        model.n_jobs = 1
+    _state = (model, X, y, baseline)
+
+
+def _predict(model, X: np.ndarray) -> np.ndarray:
+    """Predict with the column names the model was fitted with (a view, no copy)."""
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None:
+        X = pd.DataFrame(X, columns=names, copy=False)
+    return model.predict(X)
+
+
+def _permute_feature(column: int, n_repeats: int, seed: int, deadline: float) -> dict:
+    """Score drops for one feature; stops early once the deadline passes."""
+    model, X, y, baseline = _state
+    rng = np.random.default_rng(seed + column)
+    X_perm = X.copy()
+    drops = []
+    for _ in range(n_repeats):
+        if time.time() > deadline:
+            break
+        X_perm[:, column] = rng.permutation(X[:, column])
+        drops.append(baseline - r2_score(y, _predict(model, X_perm)))
+    return {"column": column, "drops": drops}
+
+
+# --------------------------------------------------------------------
+# Importances
+# --------------------------------------------------------------------
+def impurity_importances(model, features: list) -> list:
+    """[[feature, importance], ...] sorted descending, or [] if the model has none."""
+    scores = getattr(model, "feature_importances_", None)
+    if scores is None:
+        return []
+    return sorted(([f, round(float(s), 6)] for f, s in zip(features, scores)), key=lambda p: -p[1])
+
+
+def permutation_importances(model, X, y, workers: int = 1, n_repeats: int = IMPORTANCE_REPEATS,
+                            max_rows: int = IMPORTANCE_ROWS, budget_s: float = IMPORTANCE_BUDGET_S,
+                            seed: int = 0) -> dict:
+    """Permutation importance of every column of X, parallel across features."""
+    global _state
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float64)
+    if len(X) > max_rows:
+        rows = np.random.default_rng(seed).choice(len(X), max_rows, replace=False)
+        X, y = X[rows], y[rows]
+
+    started = time.time()
+    deadline = started + budget_s
+    baseline = float(r2_score(y, _predict(model, X)))
+    columns = range(X.shape[1])
+    workers = max(1, min(workers, X.shape[1]))
+
+    if workers == 1:
+        _state = (model, X, y, baseline)
+        results = [_permute_feature(c, n_repeats, seed, deadline) for c in columns]
+        _state = None
+    else:
+        tmp_dir = tempfile.mkdtemp(prefix="importance-")
+        try:
+            model_path = os.path.join(tmp_dir, "model.joblib")
+            joblib.dump(model, model_path)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(model_path, X, y, baseline)) as pool:
+                results = list(pool.map(
+                    _permute_feature, columns, [n_repeats] * len(columns),
+                    [seed] * len(columns), [deadline] * len(columns),
+                ))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    per_feature = []
+    for r in results:
+        drops = r["drops"]
+        per_feature.append({
+            "column": r["column"],
+            "mean": round(float(np.mean(drops)), 6) if drops else None,
+            "std": round(float(np.std(drops)), 6) if drops else None,
+            "repeats": len(drops),
+        })
+    return {
+        "baseline_r2": round(baseline, 6),
+        "eval_rows": int(len(X)),
+        "workers": workers,
+        "elapsed_s": round(time.time() - started, 3),
+        "complete": all(p["repeats"] == n_repeats for p in per_feature),
+        "per_feature": per_feature,
+    }
+
+
+def _importance_path() -> str:
+    return os.getenv("FEATURE_IMPORTANCE_PATH", "./artifacts/ml_results/feature_importances.json")
+
+
+def remove_feature_importances():
+    """Drop FEATURE_IMPORTANCE_PATH so the plot never shows an older model's importances."""
+    path = _importance_path()
+    try:
+        os.remove(path)
+        logger.info(f"Removed stale feature importances at {path}")
+    except FileNotFoundError:
+        pass
+
+
+def write_feature_importances(model, X_test, y_test, params: dict, report=lambda e: None):
+    """
+    Compute importances for a trained model and write FEATURE_IMPORTANCE_PATH.
+    The "feature_importances" key holds [[feature, score], ...], which
+    mcp_dv's plot_feature_importances reads. Returns the path, or None
+    (and removes the previous file) when disabled.
+    """
+    mode = (params or {}).get("importance", IMPORTANCE_MODE)
+    if mode == "off":
+        remove_feature_importances()
+        return None
+    features = list(X_test.columns)
+    impurity = impurity_importances(model, features)
+    payload = {"method": "impurity", "impurity": impurity, "feature_importances": impurity}
+
+    if mode == "permutation":
+        perm = permutation_importances(
+            model, X_test, y_test,
+            workers=(params or {}).get("n_jobs") or 1,
+            seed=(params or {}).get("random_state", 0),
+        )
+        for p in perm["per_feature"]:
+            p["feature"] = features[p.pop("column")]
+        payload["permutation"] = perm
+        scored = [[p["feature"], p["mean"]] for p in perm["per_feature"] if p["mean"] is not None]
+        if len(scored) == len(features):
+            payload["method"] = "permutation"
+            payload["feature_importances"] = sorted(scored, key=lambda p: -p[1])
+        else:
+            logger.warning("Permutation importance hit its time budget; plotting impurity importances")
+    if not payload["feature_importances"]:
+        remove_feature_importances()
+        return None
+
+    path = _importance_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+    report({"stage": "importances", "method": payload["method"], "top": payload["feature_importances"][:5]})
+    logger.info(f"💾 Feature importances ({payload['method']}) saved at {path}")
+    return path
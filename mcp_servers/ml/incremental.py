@@ -0,0 +1,162 @@
+# mcp_servers/ml/incremental.py
+"""
+Incremental retraining when rows are appended to the processed dataset.
+
+The active model's dataset hash is matched against the columnar cache
+manifest. If the current CSV is that file plus appended rows, the forest
+is updated from the new rows only:
+
+    warm_start  add trees grown on the new rows (count proportional to
+                how much data was added)
+    rolling     replace the oldest share of trees with trees grown on the
+                most recent rows
+
+The holdout is pipeline.holdout_split (a hash of the row number) with
+the test_size/random_state stored in the base version's meta, i.e. the
+split it was trained with, so held-out rows stay held out across
+retrains and the new trees never see them. Anything else (no active
+forest, an edited file, other features) falls back to a full retrain.
+"""
+import os
+import math
+import logging
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from mcp_servers.ml.dataset_cache import open_dataset, appended_rows, cached_manifest, category_lists
+from mcp_servers.ml.pipeline import (
+    DEFAULT_TRAIN_PARAMS,
+    dataset_path,
+    evaluate_model,
+    forest_params,
+    holdout_split,
+    run_training,
+    save_artifacts,
+    split_params,
+)
+from mcp_servers.ml.registry import ModelRegistry
+from mcp_servers.ml.splits import hash_split
+from mcp_servers.ml.importance import write_feature_importances
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETRAIN_PARAMS = {
+    "strategy": "warm_start",  # or "rolling"
+    "rolling_share": 0.25,     # rolling: share of trees replaced
+    "max_new_trees": 200,      # warm_start: cap on trees added per retrain
+}
+
+
+def _frame(dataset, features: list, rows) -> pd.DataFrame:
+    return pd.DataFrame(dataset.matrix(features, np.float32, rows), columns=features, copy=False)
+
+
+def run_retrain(params: dict, report) -> dict:
+    """Update the active forest with appended rows (the "retrain" job)."""
+    params = {**DEFAULT_TRAIN_PARAMS, **DEFAULT_RETRAIN_PARAMS, **(params or {})}
+    target_col = os.getenv("TARGET_COLUMN", "target")
+    registry = ModelRegistry()
+    strategy = params["strategy"]
+    if strategy not in ("warm_start", "rolling"):
+        raise ValueError(f"Unknown retrain strategy '{strategy}'")
+
+    def full_retrain(reason: str) -> dict:
+        logger.info(f"Full retrain: {reason}")
+        report({"stage": "full_retrain", "reason": reason})
+        result = run_training(params, report)
+        result["incremental"] = {"applied": False, "reason": reason}
+        return result
+
+    base_version = registry.active_version()
+    if base_version is None:
+        return full_retrain("no active model")
+    base_meta = registry.get(base_version)
+    old_rows = base_meta.get("dataset_hash") and appended_rows(base_meta["dataset_hash"], dataset_path())
+    if not old_rows:
+        return full_retrain("dataset is not an append of the active model's dataset")
+
+    dataset = open_dataset(dataset_path())
+    features = [c for c in dataset.columns if c != target_col]
+    if features != base_meta.get("feature_names"):
+        return full_retrain("feature columns changed")
+    # codes follow the sorted category list, so a new value can shift the old ones
+    if category_lists(cached_manifest(base_meta["dataset_hash"])) != category_lists(dataset.manifest):
+        return full_retrain("category values changed")
+    base = registry.load_model(base_version)
+    if not isinstance(base, RandomForestRegressor):
+        return full_retrain("active model is not a RandomForest")
+
+    new_rows = dataset.n_rows - old_rows
+    if new_rows == 0:
+        return {"status": "success", "model_version": base_version,
+                "incremental": {"applied": False, "reason": "no new rows"}}
+
+    # the base's split, not this call's: otherwise its held-out rows could be trained on
+    split = base_meta.get("split") or {
+        # versions registered before the split was stored: forest seed, default size
+        "test_size": DEFAULT_TRAIN_PARAMS["test_size"],
+        "random_state": base_meta.get("params", {}).get("random_state", DEFAULT_TRAIN_PARAMS["random_state"]),
+    }
+    seed, test_size = split["random_state"], split["test_size"]
+    n_trees = len(base.estimators_)
+    if strategy == "warm_start":
+        window = np.arange(old_rows, dataset.n_rows)
+        n_new_trees = min(params["max_new_trees"], max(1, math.ceil(n_trees * new_rows / old_rows)))
+    else:
+        # most recent rows, at least the share of the data the replaced trees stood for
+        window_rows = max(new_rows, int(params["rolling_share"] * dataset.n_rows))
+        window = np.arange(dataset.n_rows - window_rows, dataset.n_rows)
+        n_new_trees = max(1, round(params["rolling_share"] * n_trees))
+    train_rows = window[~hash_split(window, test_size, seed)]
+    report({"stage": "loaded", "base_version": base_version, "old_rows": old_rows,
+            "new_rows": new_rows, "train_rows": int(train_rows.size), "strategy": strategy})
+    if train_rows.size == 0:
+        return full_retrain("no new training rows outside the holdout")
+
+    X_train = _frame(dataset, features, train_rows)
+    y_train = np.asarray(dataset.raw(target_col))[train_rows].astype(np.float64)
+    n_jobs = params.get("n_jobs")
+    if strategy == "warm_start":
+        model = base
+        model.set_params(warm_start=True, n_estimators=n_trees + n_new_trees, n_jobs=n_jobs)
+        model.fit(X_train, y_train)
+        model.set_params(warm_start=False)
+    else:
+        fresh = RandomForestRegressor(
+            **{**forest_params(base.get_params()), "n_estimators": n_new_trees,
+               "random_state": seed + len(registry.versions()), "n_jobs": n_jobs}
+        ).fit(X_train, y_train)
+        model = base
+        model.estimators_ = base.estimators_[n_new_trees:] + fresh.estimators_
+        model.n_estimators = len(model.estimators_)
+    report({"stage": "trained", "trees_added": n_new_trees, "trees_total": len(model.estimators_)})
+
+    # stable holdout: the same rows as the base model's, plus appended ones
+    _, test_rows = holdout_split(dataset.n_rows, test_size, seed)
+    X_test = _frame(dataset, features, test_rows)
+    y_test = np.asarray(dataset.raw(target_col))[test_rows].astype(np.float64)
+    metrics, y_pred = evaluate_model(model, X_test, y_test, n_jobs=n_jobs)
+    report({"stage": "evaluated", "metrics": metrics})
+    result = save_artifacts(model, y_test, y_pred, X_train, X_test, metrics)
+    result["feature_importances_path"] = write_feature_importances(
+        model, X_test, y_test, params, report
+    )
+
+    incremental = {
+        "applied": True,
+        "strategy": strategy,
+        "base_version": base_version,
+        "base_metrics": base_meta.get("metrics"),
+        "old_rows": old_rows,
+        "new_rows": new_rows,
+        "trees_added": n_new_trees,
+        "trees_total": len(model.estimators_),
+    }
+    meta = registry.register(
+        model, metrics, dataset.sha256, forest_params(model.get_params()), features,
+        extra={"incremental": incremental, "split": split_params(split)}, activate=False,
+    )
+    result.update(model_version=meta["version"], incremental=incremental)
+    return result
@@ -0,0 +1,295 @@
+# mcp_servers/ml/jobs.py
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+import threading
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from mcp_servers.ml.resources import CpuBudget, JobTimer, cpu_lease, init_worker, DEFAULT_N_JOBS
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------
+# Configuration
+# --------------------------------------------------------------------
+JOB_WORKERS = int(os.getenv("ML_JOB_WORKERS", min(4, os.cpu_count() or 1)))
+JOBS_DIR = os.getenv("ML_JOBS_DIR", "./artifacts/ml_results/jobs")
+
+ACTIVE_STATES = ("queued", "running")
+# a running job asked to stop; it ends as "cancelled" at its next progress report
+CANCELLING = "cancelling"
+FINAL_STATES = ("succeeded", "failed", "cancelled")
+
+
+# --------------------------------------------------------------------
+# Worker side
+# --------------------------------------------------------------------
+class JobCancelled(Exception):
+    pass
+
+
+class ProgressReporter:
+    """
+    Appends progress events to a job's .progress.jsonl file (runs in the
+    worker). Every report is also a cancellation point: once the job's
+    cancel marker exists, the next report raises JobCancelled, so tasks
+    stop before writing artifacts or touching the registry.
+    """
+
+    def __init__(self, path: str, cancel_path: str = None):
+        self.path = path
+        self.cancel_path = cancel_path
+
+    def __call__(self, event: dict):
+        if self.cancel_path and os.path.exists(self.cancel_path):
+            raise JobCancelled(f"cancelled before stage '{event.get('stage')}'")
+        event = {"time": time.time(), **event}
+        with open(self.path, "a") as f:
+            f.write(json.dumps(event, default=str) + "\n")
+
+
+def execute_job(task, params: dict, progress_path: str, cancel_path: str = None):
+    """
+    Entry point in the worker process: lease cores from the shared budget,
+    run one task with a progress reporter and attach its resource usage.
+    """
+    report = ProgressReporter(progress_path, cancel_path)
+    with cpu_lease(params.get("n_jobs", DEFAULT_N_JOBS)) as n_jobs:
+        report({"stage": "started", "pid": os.getpid(), "n_jobs": n_jobs})
+        with JobTimer() as timer:
+            result = task({**params, "n_jobs": n_jobs}, report)
+    resources = timer.summary(n_jobs)
+    report({"stage": "finished", **resources})
+    if isinstance(result, dict):
+        result["resources"] = resources
+    return result
+
+
+# --------------------------------------------------------------------
+# Job Manager
+# --------------------------------------------------------------------
+class JobManager:
+    """
+    Runs ML tasks in a process pool so training never blocks the event loop.
+
+    Jobs are persisted as JSON records in JOBS_DIR; progress events written
+    by the worker are appended to <job_id>.progress.jsonl. A job submitted
+    while an identical one (same kind, dataset stamp and params) is still
+    queued or running is not started again: the existing job is returned.
+
+    Tasks register models inactive and return their "model_version"; the
+    kind's on_success hook (e.g. activating that version) runs here only
+    for jobs that succeeded and were not cancelled.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, jobs_dir: str = JOBS_DIR):
+        self.workers = workers
+        self.jobs_dir = jobs_dir
+        self.tasks = {}
+        self.jobs = {}
+        self._futures = {}
+        # re-entrant: future.cancel() runs _on_done synchronously under cancel()
+        self._lock = threading.RLock()
+        self._executor = None
+        self.cpu_budget = None
+
+    def register(self, kind: str, task, fingerprint=None, on_success=None):
+        """
+        Register a task function under a job kind.
+
+        task(params, report) must be a module-level function (it is pickled to
+        the worker). fingerprint() identifies the dataset for dedup; it runs on
+        the caller's thread, so it should be cheap (a stat, not a hash).
+        on_success(result) runs in the server process after the job succeeded.
+        """
+        self.tasks[kind] = (task, fingerprint, on_success)
+
+    def start(self):
+        # Nothing touches disk or spawns processes before start(), so importing
+        # the server module (as spawned workers do) has no side effects.
+        if self._executor is None:
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            self._load_records()
+            mp_context = multiprocessing.get_context()
+            self.cpu_budget = CpuBudget(mp_context=mp_context)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp_context,
+                initializer=init_worker,
+                initargs=self.cpu_budget.initargs(),
+            )
+            logger.info(f"Job pool started with {self.workers} workers, CPU budget {self.cpu_budget.total}")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # ---------------- persistence ----------------
+    def _record_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _progress_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.progress.jsonl")
+
+    def _cancel_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.cancel")
+
+    def _persist(self, record: dict):
+        path = self._record_path(record["id"])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(record, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+    def _load_records(self):
+        for name in os.listdir(self.jobs_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.jobs_dir, name)) as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if record.get("status") == CANCELLING:
+                record.update(status="cancelled", finished_at=time.time())
+                self._persist(record)
+            elif record.get("status") in ACTIVE_STATES:
+                # the worker that owned it died with the previous server process
+                record.update(status="failed", error="interrupted by server restart", finished_at=time.time())
+                self._persist(record)
+            self.jobs[record["id"]] = record
+
+    def _read_progress(self, job_id: str) -> list:
+        path = self._progress_path(job_id)
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    # ---------------- public API ----------------
+    def dedup_key(self, kind: str, params: dict) -> str:
+        _, fingerprint, _ = self.tasks[kind]
+        dataset_hash = fingerprint() if fingerprint else None
+        raw = json.dumps({"kind": kind, "dataset": dataset_hash, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def submit(self, kind: str, params: dict = None) -> dict:
+        """Queue a job, or return the identical job that is already queued/running."""
+        if kind not in self.tasks:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        params = params or {}
+        key = self.dedup_key(kind, params)
+
+        with self._lock:
+            for record in self.jobs.values():
+                if record.get("dedup_key") == key and record["status"] in ACTIVE_STATES:
+                    logger.info(f"Job {record['id']} already {record['status']} for same dataset/params")
+                    return {**record, "deduplicated": True}
+
+            self.start()
+            job_id = uuid.uuid4().hex[:12]
+            record = {
+                "id": job_id,
+                "kind": kind,
+                "status": "queued",
+                "params": params,
+                "dedup_key": key,
+                "submitted_at": time.time(),
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            self.jobs[job_id] = record
+            self._persist(record)
+
+            task = self.tasks[kind][0]
+            future = self._executor.submit(
+                execute_job, task, params, self._progress_path(job_id), self._cancel_path(job_id)
+            )
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f, job_id=job_id: self._on_done(job_id, f))
+        logger.info(f"Job {job_id} ({kind}) queued")
+        return record
+
+    def _on_done(self, job_id: str, future):
+        with self._lock:
+            record = self.jobs[job_id]
+            if future.cancelled() or record.get("cancel_requested"):
+                # a job that finished anyway still leaves its model inactive
+                record["status"] = "cancelled"
+            elif future.exception() is not None:
+                record["status"] = "failed"
+                record["error"] = str(future.exception())
+            else:
+                record["status"] = "succeeded"
+                record["result"] = future.result()
+                on_success = self.tasks[record["kind"]][2]
+                if on_success is not None:
+                    try:
+                        on_success(record["result"])
+                    except Exception as e:
+                        logger.exception(f"Job {job_id} post-processing failed")
+                        record.update(status="failed", error=f"post-processing failed: {e}")
+            record["finished_at"] = time.time()
+            self._futures.pop(job_id, None)
+            self._persist(record)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._cancel_path(job_id))
+        logger.info(f"Job {job_id} {record['status']}")
+
+    def get(self, job_id: str, with_progress: bool = True) -> dict:
+        with self._lock:
+            record = self.jobs.get(job_id)
+            if record is None:
+                raise KeyError(job_id)
+            future = self._futures.get(job_id)
+            if record["status"] == "queued" and future is not None and future.running():
+                record["status"] = "running"
+                self._persist(record)
+            record = dict(record)
+        if with_progress:
+            record["progress"] = self._read_progress(job_id)
+        return record
+
+    def list(self) -> list:
+        return [self.get(job_id, with_progress=False) for job_id in list(self.jobs)]
+
+    def cancel(self, job_id: str) -> dict:
+        """
+        Cancel a job. Jobs still waiting in the pool are dropped ("cancelled").
+        A job that is already executing is marked "cancelling": its worker
+        stops at the next progress report, and whatever it already registered
+        is never activated.
+        """
+        with self._lock:
+            record = self.jobs.get(job_id)
+            if record is None:
+                raise KeyError(job_id)
+            if record["status"] in FINAL_STATES:
+                return dict(record)
+            record["cancel_requested"] = True
+            with open(self._cancel_path(job_id), "w"):
+                pass
+            future = self._futures.get(job_id)
+            if future is not None and not future.cancel() and not future.done():
+                record["status"] = CANCELLING
+            self._persist(record)
+        return self.get(job_id)
+
+    async def wait(self, job_id: str) -> dict:
+        """Await a job's completion without blocking the event loop."""
+        future = self._futures.get(job_id)
+        if future is not None:
+            loop = asyncio.get_running_loop()
+            done = asyncio.Event()
+            # runs after _on_done (callbacks fire in registration order)
+            future.add_done_callback(lambda _: loop.call_soon_threadsafe(done.set))
+            await done.wait()
+        return self.get(job_id)
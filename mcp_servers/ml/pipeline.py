@@ -0,0 +1,229 @@
+# mcp_servers/ml/pipeline.py
+import os
+import json
+import logging
+import joblib
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import (
+    root_mean_squared_error,
+    mean_absolute_error,
+    r2_score,
+)
+
+from mcp_servers.ml.registry import ModelRegistry
+from mcp_servers.ml.dataset_cache import open_dataset, source_fingerprint
+from mcp_servers.ml.streaming import run_streaming_training, MEMORY_BUDGET_MB
+from mcp_servers.ml.splits import hash_split
+from mcp_servers.ml.importance import write_feature_importances, remove_feature_importances
+
+# --------------------------------------------------------------------
+# Setup
+# --------------------------------------------------------------------
+# Everything here runs inside job worker processes, so it must stay
+# importable without the FastAPI app.
+load_dotenv()
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+# memory: RandomForest on the full dataset; stream: out-of-core SGD;
+# auto: stream when the CSV is larger than the streaming memory budget.
+TRAIN_MODE = os.getenv("ML_TRAIN_MODE", "memory")
+
+DEFAULT_TRAIN_PARAMS = {
+    "n_estimators": 200,
+    "random_state": 42,
+    "test_size": 0.2,
+}
+
+
+# --------------------------------------------------------------------
+# Utility Functions
+# --------------------------------------------------------------------
+def dataset_path() -> str:
+    return os.getenv("DATA_PROCESSED_PATH", "./processed/processed_data.csv")
+
+
+def dataset_fingerprint(path: str = None) -> str:
+    """SHA-256 of the dataset file contents (remembered against size/mtime)."""
+    return source_fingerprint(path or dataset_path())
+
+
+def dataset_stamp(path: str = None) -> str:
+    """
+    Cheap identity of the dataset file (path, size, mtime) used to dedup
+    job submissions: it runs on the event loop, so nothing is read.
+    """
+    path = os.path.abspath(path or dataset_path())
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return f"{path}:missing"
+    return f"{path}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def load_dataset() -> pd.DataFrame:
+    """Load the processed dataset from the columnar cache."""
+    df = open_dataset(dataset_path()).frame()
+    logger.info(f"✅ Loaded dataset: {df.shape[0]} rows, {df.shape[1]} columns")
+    return df
+
+
+def load_training_data(target_col: str):
+    """
+    Features as a float32 frame (the dtype the forest trains on anyway, so
+    sklearn does not copy it again) and the target, read from the cache.
+    Returns (X, y, dataset_hash).
+    """
+    dataset = open_dataset(dataset_path())
+    if target_col not in dataset.columns:
+        raise ValueError(f"Target column '{target_col}' not found in dataset.")
+    features = [c for c in dataset.columns if c != target_col]
+    X = pd.DataFrame(dataset.matrix(features, np.float32), columns=features, copy=False)
+    y = pd.Series(np.asarray(dataset.raw(target_col), dtype=np.float64), name=target_col)
+    logger.info(f"✅ Loaded dataset: {dataset.n_rows} rows, {len(dataset.columns)} columns")
+    return X, y, dataset.sha256
+
+
+def holdout_split(n_rows: int, test_size: float, seed: int) -> tuple:
+    """
+    (train_rows, test_rows) by row-number hash: the same rows are held out
+    on every run, and appended rows never move old ones across the split.
+    """
+    rows = np.arange(n_rows)
+    is_test = hash_split(rows, test_size, seed)
+    return rows[~is_test], rows[is_test]
+
+
+def split_params(params: dict) -> dict:
+    """The holdout settings, stored with each version so retrains reuse them."""
+    return {"test_size": params["test_size"], "random_state": params["random_state"]}
+
+
+def forest_params(params: dict) -> dict:
+    """Keep only the keys RandomForestRegressor accepts (job params carry extra ones)."""
+    valid = RandomForestRegressor().get_params()
+    return {k: v for k, v in {**DEFAULT_TRAIN_PARAMS, **(params or {})}.items() if k in valid}
+
+
+def train_random_forest(X_train, y_train, params: dict = None) -> RandomForestRegressor:
+    """Train the RandomForest model; trees are built on params["n_jobs"] cores."""
+    model = RandomForestRegressor(**forest_params(params))
+    model.fit(X_train, y_train)
+    logger.info(f"✅ RandomForest training complete (n_jobs={model.n_jobs}).")
+    return model
+
+
+def evaluate_model(model, X_test, y_test, n_jobs: int = None) -> dict:
+    """Compute evaluation metrics; prediction runs on n_jobs cores when given."""
+    if n_jobs is not None and hasattr(model, "n_jobs"):
+        model.n_jobs = n_jobs
+    y_pred = model.predict(X_test)
+
+    metrics = {
+        "RMSE": round(float(root_mean_squared_error(y_test, y_pred)), 4),
+        "MAE": round(float(mean_absolute_error(y_test, y_pred)), 4),
+        "R2": round(float(r2_score(y_test, y_pred)), 4),
+    }
+
+    logger.info(f"📊 Model metrics: {json.dumps(metrics, indent=2)}")
+    return metrics, y_pred
+
+
+def save_artifacts(model, y_test, y_pred, X_train, X_test, metrics) -> dict:
+    """Save model, metrics, and predictions to artifacts directory."""
+    model_path = os.getenv("MODEL_PATH", "./models/random_forest.pkl")
+    result_dir = "./artifacts/ml_results"
+    os.makedirs(result_dir, exist_ok=True)
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+
+    # Save model
+    joblib.dump(model, model_path)
+    logger.info(f"💾 Model saved at {model_path}")
+
+    # Save predictions
+    pred_path = os.path.join(result_dir, "predictions.csv")
+    pd.DataFrame({"y_true": y_test, "y_pred": y_pred}).to_csv(pred_path, index=False)
+    logger.info(f"💾 Predictions saved at {pred_path}")
+
+    # Save metrics
+    metrics_path = os.path.join(result_dir, "metrics.json")
+    with open(metrics_path, "w") as f:
+        json.dump(metrics, f, indent=2)
+    logger.info(f"💾 Metrics saved at {metrics_path}")
+
+    return {
+        "status": "success",
+        "metrics": metrics,
+        "train_rows": len(X_train),
+        "test_rows": len(X_test),
+        "model_path": model_path,
+        "predictions_path": pred_path,
+        "metrics_path": metrics_path,
+        "result_path": result_dir,
+    }
+
+
+# --------------------------------------------------------------------
+# Job Tasks
+# --------------------------------------------------------------------
+def training_mode(params: dict) -> str:
+    mode = (params or {}).get("mode", TRAIN_MODE)
+    if mode == "auto":
+        too_big = os.path.getsize(dataset_path()) > MEMORY_BUDGET_MB * 2**20
+        return "stream" if too_big else "memory"
+    if mode not in ("memory", "stream"):
+        raise ValueError(f"Unknown training mode '{mode}'")
+    return mode
+
+
+def run_stream_job(params: dict, report) -> dict:
+    """Out-of-core training (the "train" job in stream mode)."""
+    target_col = os.getenv("TARGET_COLUMN", "target")
+    model, features, result = run_streaming_training(dataset_path(), target_col, params, report)
+    # no importances in stream mode; don't leave the previous model's on the plot
+    remove_feature_importances()
+    result["feature_importances_path"] = None
+    meta = ModelRegistry().register(
+        model, result["metrics"], dataset_fingerprint(), {"mode": "stream", **(params or {})}, features,
+        activate=False,
+    )
+    result["model_version"] = meta["version"]
+    return result
+
+
+def run_training(params: dict, report) -> dict:
+    """
+    Full load → split → train → evaluate → save pipeline (the "train" job).
+    The new version is registered inactive; the job manager activates it
+    once the job has succeeded.
+    """
+    if training_mode(params) == "stream":
+        return run_stream_job(params, report)
+    params = {**DEFAULT_TRAIN_PARAMS, **(params or {})}
+    target_col = os.getenv("TARGET_COLUMN", "target")
+
+    X, y, dataset_hash = load_training_data(target_col)
+    report({"stage": "loaded", "rows": int(X.shape[0]), "columns": int(X.shape[1]) + 1})
+
+    train_rows, test_rows = holdout_split(len(X), params["test_size"], params["random_state"])
+    X_train, X_test = X.iloc[train_rows], X.iloc[test_rows]
+    y_train, y_test = y.iloc[train_rows], y.iloc[test_rows]
+
+    model = train_random_forest(X_train, y_train, params)
+    report({"stage": "trained"})
+    metrics, y_pred = evaluate_model(model, X_test, y_test, n_jobs=params.get("n_jobs"))
+    report({"stage": "evaluated", "metrics": metrics})
+    result = save_artifacts(model, y_test, y_pred, X_train, X_test, metrics)
+    result["feature_importances_path"] = write_feature_importances(
+        model, X_test, y_test, params, report
+    )
+
+    meta = ModelRegistry().register(
+        model, metrics, dataset_hash, forest_params(params), list(X.columns), activate=False,
+        extra={"split": split_params(params)},
+    )
+    result["model_version"] = meta["version"]
+    return result
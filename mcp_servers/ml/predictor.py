@@ -0,0 +1,189 @@
+# mcp_servers/ml/predictor.py
+import os
+import time
+import asyncio
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Largest batch handed to one predict call, and how long the first request
+# of a batch may wait for company.
+MAX_BATCH_ROWS = int(os.getenv("ML_PREDICT_MAX_BATCH", 1024))
+MAX_WAIT_MS = float(os.getenv("ML_PREDICT_MAX_WAIT_MS", 5))
+# "packed" serves the memory-mapped array format when a version has one,
+# "sklearn" always unpickles the estimator.
+PREDICT_ENGINE = os.getenv("ML_PREDICT_ENGINE", "packed")
+
+
+class LoadedModel:
+    """An in-memory model version; replaced as a whole on hot swap."""
+
+    def __init__(self, version: str, model, feature_names: list, engine: str = "sklearn"):
+        self.version = version
+        self.model = model
+        self.feature_names = feature_names
+        self.engine = engine
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.engine == "packed":
+            return self.model.predict(X)
+        return self.model.predict(pd.DataFrame(X, columns=self.feature_names))
+
+
+class Predictor:
+    """
+    Serves the registry's active model from memory and micro-batches requests.
+
+    Concurrent predict() calls are queued; a single batch loop concatenates
+    whatever arrives within MAX_WAIT_MS (up to MAX_BATCH_ROWS rows) and runs
+    one vectorized predict in a worker thread. Swapping versions loads the new
+    model first and then replaces the reference, so requests are never
+    without a model and each batch is served by exactly one version.
+    """
+
+    def __init__(self, registry, max_batch_rows: int = MAX_BATCH_ROWS, max_wait_ms: float = MAX_WAIT_MS):
+        self.registry = registry
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self.current = None
+        self._queue = None
+        self._task = None
+        self._active_stamp = None
+        self._swap_lock = None
+        self.stats = {"requests": 0, "batches": 0, "rows": 0}
+
+    # ---------------- lifecycle ----------------
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._swap_lock = asyncio.Lock()
+        await self.refresh()
+        self._task = asyncio.create_task(self._batch_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def load(self, version: str):
+        """Load a version off the event loop, then swap it in atomically."""
+        async with self._swap_lock:
+            return await self._load_locked(version)
+
+    async def _load_locked(self, version: str):
+        if self.current is not None and self.current.version == version:
+            return self.current
+        started = time.perf_counter()
+        meta = await asyncio.to_thread(self.registry.get, version)
+        model, engine = None, "sklearn"
+        if PREDICT_ENGINE == "packed":
+            model = await asyncio.to_thread(self.registry.load_packed, version)
+            engine = "packed" if model is not None else engine
+        if model is None:
+            model = await asyncio.to_thread(self.registry.load_model, version)
+        self.current = LoadedModel(version, model, meta["feature_names"], engine)
+        logger.info(f"Predictor now serving {version} via {engine} (loaded in {time.perf_counter() - started:.2f}s)")
+        return self.current
+
+    async def refresh(self):
+        """Pick up a changed ACTIVE pointer (e.g. a training job registered a new version)."""
+        stamp = self.registry.active_stamp()
+        if stamp == self._active_stamp:
+            return
+        async with self._swap_lock:
+            if stamp == self._active_stamp:
+                return  # another caller already loaded it
+            version = self.registry.active_version()
+            if version:
+                await self._load_locked(version)
+            self._active_stamp = stamp
+
+    # ---------------- serving ----------------
+    def _to_matrix(self, rows, feature_names: list) -> np.ndarray:
+        """Validate every row of one request; raises ValueError for bad input."""
+        if not isinstance(rows, list) or not rows:
+            raise ValueError("'rows' must be a non-empty list")
+        is_dict = [isinstance(row, dict) for row in rows]
+        if all(is_dict):
+            for i, row in enumerate(rows):
+                missing = [f for f in feature_names if f not in row]
+                if missing:
+                    raise ValueError(f"Row {i}: missing features: {missing}")
+            rows = [[row[f] for f in feature_names] for row in rows]
+        elif any(is_dict):
+            raise ValueError("Rows must be all objects or all lists")
+        try:
+            X = np.asarray(rows, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("Rows must hold numeric feature values")
+        if X.ndim != 2 or X.shape[1] != len(feature_names):
+            raise ValueError(f"Expected rows of {len(feature_names)} features")
+        return X
+
+    async def predict(self, rows: list):
+        """Returns (version, predictions) for the given rows (dicts or lists)."""
+        # a stat() per request; validates against a newly activated version
+        await self.refresh()
+        if self.current is None:
+            raise RuntimeError("No active model; train one first")
+        # validated per request: a bad request fails alone, never its batch
+        features = self.current.feature_names
+        X = self._to_matrix(rows, features)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((X, features, future))
+        return await future
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            items = [item]
+            rows = len(item[0])
+            deadline = loop.time() + self.max_wait
+            while rows < self.max_batch_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                items.append(item)
+                rows += len(item[0])
+
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Could not refresh active model: {e}")
+            model = self.current  # one snapshot per batch
+            served = []
+            for x, features, fut in items:
+                if features == model.feature_names:
+                    served.append((x, fut))
+                elif not fut.done():
+                    # validated against a version with other features; swapped since
+                    fut.set_exception(RuntimeError("Active model changed while queued; retry the request"))
+            if not served:
+                continue
+            try:
+                batch = np.vstack([x for x, _ in served])
+                preds = await asyncio.to_thread(model.predict, batch)
+            except Exception as e:
+                for _, fut in served:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            offset = 0
+            for x, fut in served:
+                if not fut.done():
+                    fut.set_result((model.version, preds[offset:offset + len(x)].tolist()))
+                offset += len(x)
+            self.stats["requests"] += len(items)
+            self.stats["batches"] += 1
+            self.stats["rows"] += rows
@@ -0,0 +1,136 @@
+# mcp_servers/ml/registry.py
+import os
+import json
+import time
+import logging
+import joblib
+
+from mcp_servers.ml.forest_pack import pack_forest, load_packed
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_DIR = os.getenv("ML_REGISTRY_DIR", "./models/registry")
+
+
+class ModelRegistry:
+    """
+    Versioned, file-based model store.
+
+    Each version lives in <root>/<version>/ with the pickled model and a
+    meta.json (metrics, dataset hash, params, feature names). The ACTIVE file
+    names the version /predict serves; it is replaced atomically, so readers
+    always see either the old or the new version. Safe to use from several
+    worker processes at once: version directories are claimed with mkdir.
+    """
+
+    def __init__(self, root: str = REGISTRY_DIR):
+        self.root = root
+
+    def _version_dir(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def _active_path(self) -> str:
+        return os.path.join(self.root, "ACTIVE")
+
+    def _claim_version(self) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        existing = [int(v[1:]) for v in os.listdir(self.root) if v.startswith("v") and v[1:].isdigit()]
+        number = max(existing, default=0) + 1
+        while True:
+            version = f"v{number:04d}"
+            try:
+                os.mkdir(self._version_dir(version))
+                return version
+            except FileExistsError:
+                number += 1
+
+    def register(self, model, metrics: dict, dataset_hash: str, params: dict,
+                 feature_names: list, activate: bool = True, extra: dict = None) -> dict:
+        """Store a new model version (and make it active unless told otherwise)."""
+        version = self._claim_version()
+        version_dir = self._version_dir(version)
+        model_path = os.path.join(version_dir, "model.joblib")
+        joblib.dump(model, model_path)
+
+        # compact memory-mappable copy for serving (forests only)
+        packed_path = None
+        if hasattr(model, "estimators_"):
+            try:
+                packed_path = pack_forest(model, os.path.join(version_dir, "forest"), feature_names)
+            except ValueError as e:
+                logger.warning(f"Model not packed: {e}")
+
+        meta = {
+            "version": version,
+            "created_at": time.time(),
+            "model_path": model_path,
+            "packed_path": packed_path,
+            "metrics": metrics,
+            "dataset_hash": dataset_hash,
+            "params": params,
+            "feature_names": list(feature_names),
+            **(extra or {}),
+        }
+        # meta.json is written last: a version without it is incomplete
+        self._write_json(os.path.join(version_dir, "meta.json"), meta)
+        logger.info(f"💾 Registered model {version} at {version_dir}")
+
+        if activate:
+            self.activate(version)
+        return meta
+
+    def _write_json(self, path: str, payload):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+    def get(self, version: str) -> dict:
+        meta_path = os.path.join(self._version_dir(version), "meta.json")
+        if not os.path.exists(meta_path):
+            raise KeyError(version)
+        with open(meta_path) as f:
+            return json.load(f)
+
+    def versions(self) -> list:
+        if not os.path.isdir(self.root):
+            return []
+        result = []
+        for version in sorted(os.listdir(self.root)):
+            try:
+                result.append(self.get(version))
+            except (KeyError, NotADirectoryError, ValueError):
+                continue
+        return result
+
+    def active_version(self):
+        try:
+            with open(self._active_path()) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def active_stamp(self):
+        """Cheap change marker for the ACTIVE pointer (None if there is none)."""
+        try:
+            return os.stat(self._active_path()).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def activate(self, version: str):
+        self.get(version)  # raises KeyError for unknown / incomplete versions
+        tmp_path = f"{self._active_path()}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(version)
+        os.replace(tmp_path, self._active_path())
+        logger.info(f"Active model is now {version}")
+
+    def load_model(self, version: str):
+        return joblib.load(self.get(version)["model_path"])
+
+    def load_packed(self, version: str):
+        """Memory-mapped packed forest for a version, or None if it has none."""
+        packed_path = self.get(version).get("packed_path")
+        if not packed_path or not os.path.exists(packed_path):
+            return None
+        return load_packed(packed_path)
@@ -0,0 +1,113 @@
+# mcp_servers/ml/resources.py
+import os
+import time
+import logging
+import contextlib
+import multiprocessing
+
+from threadpoolctl import threadpool_limits
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------
+# Configuration
+# --------------------------------------------------------------------
+# Total cores all concurrent ML jobs may use together.
+CPU_BUDGET = int(os.getenv("ML_CPU_BUDGET", os.cpu_count() or 1))
+# Cores a job asks for when its params don't say; -1 = whatever the budget allows.
+DEFAULT_N_JOBS = int(os.getenv("ML_N_JOBS", -1))
+
+# Set in each pool worker by init_worker: (Condition, shared free-core counter).
+_shared = None
+
+
+class CpuBudget:
+    """
+    Cross-process core budget shared by all job workers.
+
+    Created in the server process and handed to the pool workers through the
+    executor initializer; workers lease cores from it with cpu_lease().
+    """
+
+    def __init__(self, total: int = CPU_BUDGET, mp_context=None):
+        ctx = mp_context or multiprocessing.get_context()
+        self.total = max(1, total)
+        self.cond = ctx.Condition()
+        self.free = ctx.Value("i", self.total, lock=False)
+
+    def initargs(self) -> tuple:
+        return (self.cond, self.free, self.total)
+
+
+def init_worker(cond, free, total):
+    """ProcessPoolExecutor initializer: attach the worker to the shared budget."""
+    global _shared
+    _shared = (cond, free, total)
+
+
+def resolve_n_jobs(requested) -> int:
+    """Turn an n_jobs request (None / -1 / n) into a positive core count."""
+    limit = _shared[2] if _shared else (os.cpu_count() or 1)
+    if requested is None or requested == -1:
+        return limit
+    if requested < -1:
+        # joblib convention: -2 = all but one, ...
+        return max(1, limit + 1 + requested)
+    return max(1, min(int(requested), limit))
+
+
+@contextlib.contextmanager
+def cpu_lease(requested=DEFAULT_N_JOBS):
+    """
+    Lease cores for the duration of a job and yield how many were granted.
+
+    Blocks until at least one core is free, then grants up to the request
+    from what is left, so concurrent jobs never oversubscribe the budget.
+    BLAS/OpenMP pools are capped to the grant as well.
+    """
+    wanted = resolve_n_jobs(requested)
+    if _shared is None:
+        granted = wanted
+    else:
+        cond, free, _ = _shared
+        with cond:
+            while free.value < 1:
+                cond.wait()
+            granted = min(wanted, free.value)
+            free.value -= granted
+    try:
+        with threadpool_limits(limits=granted):
+            yield granted
+    finally:
+        if _shared is not None:
+            cond, free, _ = _shared
+            with cond:
+                free.value += granted
+                cond.notify_all()
+
+
+class JobTimer:
+    """Wall and CPU time for a job, including threads and waited-for child processes."""
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._times = os.times()
+        return self
+
+    def __exit__(self, *exc):
+        end = os.times()
+        self.wall_s = time.perf_counter() - self._wall
+        self.cpu_s = sum(
+            getattr(end, f) - getattr(self._times, f)
+            for f in ("user", "system", "children_user", "children_system")
+        )
+        return False
+
+    def summary(self, n_jobs: int) -> dict:
+        return {
+            "n_jobs": n_jobs,
+            "wall_s": round(self.wall_s, 3),
+            "cpu_s": round(self.cpu_s, 3),
+            # ~n_jobs when the granted cores were kept busy
+            "cpu_utilization": round(self.cpu_s / self.wall_s, 2) if self.wall_s else 0.0,
+        }
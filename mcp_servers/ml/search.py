@@ -0,0 +1,213 @@
+# mcp_servers/ml/search.py
+"""
+Successive-halving hyperparameter search for the RandomForest.
+
+All candidates are scored on a small budget (few trees or few rows). Only
+the best 1/factor of them go on to the next rung, which gets factor times
+the budget. Each rung is evaluated in parallel in a process pool sized to
+the cores the job was granted. The winner is refit on the full training
+split, evaluated on the test split and registered like a normal training
+run.
+"""
+import os
+import time
+import random
+import logging
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from threadpoolctl import threadpool_limits
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import r2_score, root_mean_squared_error
+
+from mcp_servers.ml.pipeline import (
+    DEFAULT_TRAIN_PARAMS,
+    load_training_data,
+    holdout_split,
+    split_params,
+    forest_params,
+    train_random_forest,
+    evaluate_model,
+    save_artifacts,
+)
+from mcp_servers.ml.registry import ModelRegistry
+from mcp_servers.ml.splits import hash_split
+from mcp_servers.ml.importance import write_feature_importances
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------
+# Configuration
+# --------------------------------------------------------------------
+DEFAULT_SPACE = {
+    "max_depth": [None, 8, 16],
+    "min_samples_leaf": [1, 3, 10],
+    "max_features": [1.0, 0.5, "sqrt"],
+}
+
+DEFAULT_SEARCH_PARAMS = {
+    "space": DEFAULT_SPACE,
+    "n_candidates": 27,
+    "resource": "n_estimators",  # or "n_samples"
+    "min_resource": None,        # 10 trees / n_train // factor**2 rows
+    "max_resource": None,        # n_estimators / all training rows
+    "factor": 3,
+    "val_size": 0.2,
+}
+
+# Set in each search worker by _init_worker.
+_data = None
+
+
+# --------------------------------------------------------------------
+# Candidates
+# --------------------------------------------------------------------
+def sample_candidates(space: dict, n_candidates: int, seed: int) -> list:
+    """The full grid if it is small enough, otherwise a random sample of it."""
+    valid = RandomForestRegressor().get_params()
+    unknown = [k for k in space if k not in valid]
+    if unknown:
+        raise ValueError(f"Unknown RandomForest parameters in search space: {unknown}")
+    keys = sorted(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    if len(grid) <= n_candidates:
+        return grid
+    return random.Random(seed).sample(grid, n_candidates)
+
+
+# --------------------------------------------------------------------
+# Worker side
+# --------------------------------------------------------------------
+def _init_worker(target_col: str, train_idx: np.ndarray, val_idx: np.ndarray, seed: int):
+    """Load the dataset once per search worker (memory-mapped cache, no parsing)."""
+    global _data
+    threadpool_limits(limits=1)
+    X, y, _ = load_training_data(target_col)
+    order = np.random.default_rng(seed).permutation(train_idx)
+    _data = (X.iloc[order], y.iloc[order], X.iloc[val_idx], y.iloc[val_idx])
+
+
+def _fit_score(config: dict, resource: str, amount: int, seed: int) -> dict:
+    X_train, y_train, X_val, y_val = _data
+    params = {**config, "random_state": seed, "n_jobs": 1}
+    if resource == "n_estimators":
+        params["n_estimators"] = amount
+    else:
+        params["n_estimators"] = DEFAULT_TRAIN_PARAMS["n_estimators"]
+        X_train, y_train = X_train.iloc[:amount], y_train.iloc[:amount]
+    started = time.perf_counter()
+    model = RandomForestRegressor(**params).fit(X_train, y_train)
+    y_pred = model.predict(X_val)
+    return {
+        "params": config,
+        "score": round(float(r2_score(y_val, y_pred)), 4),
+        "RMSE": round(float(root_mean_squared_error(y_val, y_pred)), 4),
+        "fit_s": round(time.perf_counter() - started, 3),
+    }
+
+
+# --------------------------------------------------------------------
+# Search
+# --------------------------------------------------------------------
+def successive_halving(candidates: list, evaluate, min_resource: int, max_resource: int,
+                       factor: int, report) -> tuple:
+    """
+    Run the rungs. evaluate(configs, amount) returns one result per config.
+    Returns (best result, rung summaries, resource units spent).
+    """
+    amount, rung, spent = min_resource, 0, 0
+    rungs = []
+    while True:
+        started = time.perf_counter()
+        results = sorted(evaluate(candidates, amount), key=lambda r: r["score"], reverse=True)
+        spent += amount * len(candidates)
+        rungs.append({
+            "rung": rung,
+            "resource": amount,
+            "candidates": len(candidates),
+            "best_score": results[0]["score"],
+            "wall_s": round(time.perf_counter() - started, 3),
+        })
+        report({"stage": "rung", **rungs[-1], "leaderboard": results[:5]})
+        if len(results) == 1 or amount >= max_resource:
+            return results[0], rungs, spent
+        candidates = [r["params"] for r in results[: max(1, len(results) // factor)]]
+        amount, rung = min(amount * factor, max_resource), rung + 1
+
+
+def search_params(params: dict) -> dict:
+    """Merge defaults and validate (raises ValueError), so bad requests fail before queueing."""
+    params = {**DEFAULT_TRAIN_PARAMS, **DEFAULT_SEARCH_PARAMS, **(params or {})}
+    if params["resource"] not in ("n_estimators", "n_samples"):
+        raise ValueError(f"Unknown search resource '{params['resource']}'")
+    if int(params["factor"]) < 2:
+        raise ValueError("factor must be at least 2")
+    sample_candidates(params["space"], int(params["n_candidates"]), params["random_state"])
+    return params
+
+
+def run_search(params: dict, report) -> dict:
+    """Hyperparameter search job: search, refit the best config, register it."""
+    params = search_params(params)
+    seed, factor, resource = params["random_state"], int(params["factor"]), params["resource"]
+    target_col = os.getenv("TARGET_COLUMN", "target")
+    started = time.perf_counter()
+
+    X, y, dataset_hash = load_training_data(target_col)
+    train_pos, test_pos = holdout_split(len(X), params["test_size"], seed)
+    is_val = hash_split(train_pos, params["val_size"], seed + 1)
+    fit_pos, val_pos = train_pos[~is_val], train_pos[is_val]
+
+    candidates = sample_candidates(params["space"], int(params["n_candidates"]), seed)
+    if resource == "n_estimators":
+        max_resource = int(params["max_resource"] or params["n_estimators"])
+        min_resource = int(params["min_resource"] or min(10, max_resource))
+    else:
+        max_resource = int(params["max_resource"] or len(fit_pos))
+        min_resource = int(params["min_resource"] or max(100, max_resource // factor ** 2))
+    workers = max(1, min(params.get("n_jobs") or 1, len(candidates)))
+    report({"stage": "search_started", "candidates": len(candidates), "workers": workers,
+            "resource": resource, "min_resource": min_resource, "max_resource": max_resource})
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(target_col, fit_pos, val_pos, seed)) as pool:
+        def evaluate(configs, amount):
+            return list(pool.map(_fit_score, configs, itertools.repeat(resource),
+                                 itertools.repeat(amount), itertools.repeat(seed)))
+
+        best, rungs, spent = successive_halving(
+            candidates, evaluate, min_resource, max_resource, factor, report
+        )
+    search_s = time.perf_counter() - started
+    report({"stage": "search_finished", "best": best, "search_s": round(search_s, 3)})
+
+    # refit the winner with the full budget on the whole training split
+    final_params = {**params, **best["params"]}
+    if resource == "n_estimators":
+        final_params["n_estimators"] = max_resource
+    X_train, X_test = X.iloc[train_pos], X.iloc[test_pos]
+    y_train, y_test = y.iloc[train_pos], y.iloc[test_pos]
+    model = train_random_forest(X_train, y_train, final_params)
+    metrics, y_pred = evaluate_model(model, X_test, y_test, n_jobs=params.get("n_jobs"))
+    report({"stage": "evaluated", "metrics": metrics})
+    result = save_artifacts(model, y_test, y_pred, X_train, X_test, metrics)
+    result["feature_importances_path"] = write_feature_importances(
+        model, X_test, y_test, final_params, report
+    )
+
+    meta = ModelRegistry().register(
+        model, metrics, dataset_hash, forest_params(final_params), list(X.columns),
+        extra={"search": {"best": best, "rungs": rungs}, "split": split_params(params)}, activate=False,
+    )
+    result.update(
+        model_version=meta["version"],
+        best_params=best["params"],
+        best_val_score=best["score"],
+        rungs=rungs,
+        candidates=len(candidates),
+        # resource units used vs. training every candidate with the full budget
+        budget_fraction=round(spent / (len(candidates) * max_resource), 3),
+        search_s=round(search_s, 3),
+    )
+    return result
@@ -0,0 +1,33 @@
+# mcp_servers/ml/splits.py
+"""
+Row-level train/test assignment that needs no shuffled copy of the data.
+
+Each row goes to the test set based on a hash of its row id and a seed, so
+the split is the same no matter how the file is chunked and rows already
+in the file keep their side when new rows are appended.
+"""
+import numpy as np
+
+_HASH_BUCKETS = 1_000_000
+
+
+def row_hash(row_ids: np.ndarray, seed: int = 0) -> np.ndarray:
+    """splitmix64 of (row_id, seed) as uint64."""
+    with np.errstate(over="ignore"):
+        x = np.asarray(row_ids, dtype=np.uint64) + np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15)
+        x ^= x >> np.uint64(30)
+        x *= np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(27)
+        x *= np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+    return x
+
+
+def hash_split(row_ids: np.ndarray, test_size: float, seed: int = 0) -> np.ndarray:
+    """Boolean mask, True for rows that belong to the test set."""
+    return (row_hash(row_ids, seed) % np.uint64(_HASH_BUCKETS)) < np.uint64(int(test_size * _HASH_BUCKETS))
+
+
+def chunk_split(start: int, n_rows: int, test_size: float, seed: int = 0) -> np.ndarray:
+    """hash_split for a chunk holding rows start .. start + n_rows - 1."""
+    return hash_split(np.arange(start, start + n_rows, dtype=np.uint64), test_size, seed)
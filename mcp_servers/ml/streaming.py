@@ -0,0 +1,252 @@
+# mcp_servers/ml/streaming.py
+"""
+Out-of-core training for datasets that do not fit in memory.
+
+The CSV is read in chunks sized from ML_STREAM_MEMORY_MB. Rows are sent to
+train or test by a hash of their row number (splits.py), so no split copy
+is made. The model is a linear SGDRegressor learned with partial_fit over
+a few epochs, and metrics are accumulated chunk by chunk. Memory use
+depends on the chunk size, not on the dataset size.
+
+Passes over the file: 1 for feature statistics, `epochs` for training,
+1 for evaluation and predictions.
+"""
+import os
+import json
+import time
+import logging
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import SGDRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from mcp_servers.ml.splits import chunk_split
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------
+# Configuration
+# --------------------------------------------------------------------
+MEMORY_BUDGET_MB = float(os.getenv("ML_STREAM_MEMORY_MB", 256))
+
+DEFAULT_STREAM_PARAMS = {
+    "epochs": 5,
+    "test_size": 0.2,
+    "random_state": 42,
+    "alpha": 1e-4,
+    "eta0": 0.01,
+    "chunk_rows": None,  # derived from the memory budget when not set
+}
+
+# parsed chunk + float copies + shuffled batch, relative to the raw row size
+_CHUNK_OVERHEAD = 4
+
+
+# --------------------------------------------------------------------
+# Incremental Metrics
+# --------------------------------------------------------------------
+class RunningMetrics:
+    """RMSE / MAE / R2 from running sums, so no predictions are kept in memory."""
+
+    def __init__(self):
+        self.n = 0
+        self.sse = 0.0
+        self.sae = 0.0
+        self.sum_y = 0.0
+        self.sum_y2 = 0.0
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray):
+        y_true = np.asarray(y_true, dtype=np.float64)
+        err = y_true - y_pred
+        self.n += len(y_true)
+        self.sse += float(err @ err)
+        self.sae += float(np.abs(err).sum())
+        self.sum_y += float(y_true.sum())
+        self.sum_y2 += float(y_true @ y_true)
+
+    def result(self) -> dict:
+        if self.n == 0:
+            return {"RMSE": None, "MAE": None, "R2": None}
+        sst = self.sum_y2 - self.sum_y ** 2 / self.n
+        return {
+            "RMSE": round(float(np.sqrt(self.sse / self.n)), 4),
+            "MAE": round(float(self.sae / self.n), 4),
+            "R2": round(float(1 - self.sse / sst), 4) if sst > 0 else 0.0,
+        }
+
+
+# --------------------------------------------------------------------
+# Chunked Reading
+# --------------------------------------------------------------------
+def plan_chunks(path: str, target_col: str, memory_mb: float = MEMORY_BUDGET_MB, chunk_rows: int = None):
+    """
+    Look at the head of the file to pick the numeric feature columns and a
+    chunk size that keeps a parsed chunk (plus working copies) within the
+    memory budget.
+    """
+    sample = pd.read_csv(path, nrows=1000)
+    if target_col not in sample.columns:
+        raise ValueError(f"Target column '{target_col}' not found in dataset.")
+    features = [c for c in sample.select_dtypes("number").columns if c != target_col]
+    skipped = [c for c in sample.columns if c not in features and c != target_col]
+    if skipped:
+        logger.warning(f"Streaming mode skips non-numeric columns: {skipped}")
+    if not features:
+        raise ValueError("No numeric feature columns to train on.")
+
+    row_bytes = 4 * len(features) + 8  # float32 features, float64 target
+    if chunk_rows is None:
+        chunk_rows = int(memory_mb * 2**20 / (row_bytes * _CHUNK_OVERHEAD))
+    return features, max(1000, int(chunk_rows))
+
+
+def iter_chunks(path: str, features: list, target_col: str, chunk_rows: int):
+    """Yield (start_row, keep, X, y) per chunk; keep is False where the target is missing."""
+    dtypes = {c: np.float32 for c in features}
+    dtypes[target_col] = np.float64
+    start = 0
+    for chunk in pd.read_csv(path, usecols=features + [target_col], dtype=dtypes, chunksize=chunk_rows):
+        n_rows = len(chunk)
+        keep = chunk[target_col].notna().to_numpy()
+        yield start, keep, chunk.loc[:, features], chunk[target_col].to_numpy()
+        start += n_rows
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return 0.0
+
+
+# --------------------------------------------------------------------
+# Training
+# --------------------------------------------------------------------
+def train_streaming(path: str, target_col: str, params: dict, report=lambda e: None) -> dict:
+    """
+    Stream the CSV through an SGD regressor. Returns the fitted pipeline
+    (imputer -> scaler -> SGD, usable on raw feature frames) with the
+    bookkeeping the job result needs.
+    """
+    params = {**DEFAULT_STREAM_PARAMS, **(params or {})}
+    test_size, seed = params["test_size"], params["random_state"]
+    features, chunk_rows = plan_chunks(path, target_col, params.get("memory_mb", MEMORY_BUDGET_MB), params["chunk_rows"])
+    report({"stage": "planned", "features": len(features), "chunk_rows": chunk_rows})
+
+    # pass 1: feature mean/std (NaN-aware) and target mean/std from train rows
+    scaler = StandardScaler()
+    y_stats = RunningMetrics()
+    n_rows = n_train = 0
+    for start, keep, X, y in iter_chunks(path, features, target_col, chunk_rows):
+        train = keep & ~chunk_split(start, len(y), test_size, seed)
+        if train.any():
+            scaler.partial_fit(X[train].to_numpy())
+            y_stats.update(y[train], np.zeros(int(train.sum())))
+        n_rows += len(y)
+        n_train += int(train.sum())
+    if n_train == 0:
+        raise ValueError("No training rows in dataset.")
+    y_mean = y_stats.sum_y / y_stats.n
+    y_std = float(np.sqrt(max(y_stats.sum_y2 / y_stats.n - y_mean ** 2, 0.0))) or 1.0
+    means = pd.DataFrame([np.nan_to_num(scaler.mean_)], columns=features)
+    imputer = SimpleImputer(strategy="mean").fit(means)
+    report({"stage": "scanned", "rows": n_rows, "train_rows": n_train})
+
+    # passes 2..: SGD on standardized features and target, chunk-shuffled
+    sgd = SGDRegressor(
+        alpha=params["alpha"], eta0=params["eta0"], learning_rate="invscaling", random_state=seed
+    )
+    rng = np.random.default_rng(seed)
+    for epoch in range(params["epochs"]):
+        loss = RunningMetrics()
+        for start, keep, X, y in iter_chunks(path, features, target_col, chunk_rows):
+            train = np.flatnonzero(keep & ~chunk_split(start, len(y), test_size, seed))
+            if train.size == 0:
+                continue
+            rng.shuffle(train)
+            Z = scaler.transform(imputer.transform(X.iloc[train]))
+            y_z = (y[train] - y_mean) / y_std
+            if hasattr(sgd, "coef_"):
+                loss.update(y_z, sgd.predict(Z))
+            sgd.partial_fit(Z, y_z)
+        report({"stage": "epoch", "epoch": epoch + 1, "train_rmse_std": loss.result()["RMSE"]})
+
+    # fold the target scaling back into the linear model so it predicts raw y
+    sgd.coef_ = sgd.coef_ * y_std
+    sgd.intercept_ = sgd.intercept_ * y_std + y_mean
+    model = Pipeline([("impute", imputer), ("scale", scaler), ("sgd", sgd)])
+
+    return {
+        "model": model,
+        "features": features,
+        "chunk_rows": chunk_rows,
+        "rows": n_rows,
+        "train_rows": n_train,
+    }
+
+
+def evaluate_streaming(model, path: str, features: list, target_col: str, params: dict,
+                       chunk_rows: int, predictions_path: str = None) -> tuple:
+    """Score the test rows chunk by chunk; optionally append them to a predictions CSV."""
+    params = {**DEFAULT_STREAM_PARAMS, **(params or {})}
+    metrics = RunningMetrics()
+    first = True
+    for start, keep, X, y in iter_chunks(path, features, target_col, chunk_rows):
+        test = keep & chunk_split(start, len(y), params["test_size"], params["random_state"])
+        if not test.any():
+            continue
+        y_pred = model.predict(X[test])
+        metrics.update(y[test], y_pred)
+        if predictions_path:
+            pd.DataFrame({"y_true": y[test], "y_pred": y_pred}).to_csv(
+                predictions_path, mode="w" if first else "a", header=first, index=False
+            )
+        first = False
+    return metrics.result(), metrics.n
+
+
+def run_streaming_training(path: str, target_col: str, params: dict, report) -> tuple:
+    """
+    Streaming counterpart of pipeline.run_training; writes the same artifacts.
+    Returns (model, feature_names, result).
+    """
+    started = time.perf_counter()
+    trained = train_streaming(path, target_col, params, report)
+    report({"stage": "trained"})
+
+    model_path = os.getenv("MODEL_PATH", "./models/random_forest.pkl")
+    result_dir = "./artifacts/ml_results"
+    os.makedirs(result_dir, exist_ok=True)
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    pred_path = os.path.join(result_dir, "predictions.csv")
+
+    metrics, n_test = evaluate_streaming(
+        trained["model"], path, trained["features"], target_col, params, trained["chunk_rows"], pred_path
+    )
+    report({"stage": "evaluated", "metrics": metrics})
+    logger.info(f"📊 Model metrics: {json.dumps(metrics, indent=2)}")
+
+    joblib.dump(trained["model"], model_path)
+    metrics_path = os.path.join(result_dir, "metrics.json")
+    with open(metrics_path, "w") as f:
+        json.dump(metrics, f, indent=2)
+    logger.info(f"💾 Streaming model, predictions and metrics saved ({time.perf_counter() - started:.2f}s)")
+
+    return trained["model"], trained["features"], {
+        "status": "success",
+        "mode": "stream",
+        "metrics": metrics,
+        "train_rows": trained["train_rows"],
+        "test_rows": n_test,
+        "chunk_rows": trained["chunk_rows"],
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "model_path": model_path,
+        "predictions_path": pred_path,
+        "metrics_path": metrics_path,
+        "result_path": result_dir,
+    }
@@ -0,0 +1,15 @@
+@echo off
+REM Move up one directory from /scripts to project root
+cd /d "%~dp0.."
+
+set LOG_DIR=scripts\logs
+if not exist %LOG_DIR% mkdir %LOG_DIR%
+
+echo Starting local LLM stand-in...
+
+:: Agents use it when LLM_BASE_URL=http://localhost:10600/v1 is set in .env
+start "Local LLM" cmd /c "python -m benchmarks.local_llm >> %LOG_DIR%\local_llm.log 2>&1"
+
+
+echo Local LLM stand-in started successfully.
+pause
@@ -4,7 +4,7 @@ echo   Stopping specific agent & MCP ports...
 echo ==========================================
 
 :: List of ports you want to stop (add/remove as needed)
-set PORTS=10010 10020 10030 10100 10200 10300 10400 10500
+set PORTS=10010 10020 10030 10100 10200 10300 10400 10500 10600
 ::set PORTS=10100 10200 10300 10010 10500
 
 
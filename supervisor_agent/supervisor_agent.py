@@ -19,6 +19,7 @@ logging.basicConfig(level=logging.INFO)
 class PipelineState(TypedDict, total=False):
     messages: list
     data_results: dict
+    methods: str
     ml_result: dict
     dv_result: dict
 
@@ -159,7 +160,7 @@ class SupervisorAgent:
         )
         response = await client.send_message(req)
         logger.info(f"Data Agent Response: {response.model_dump(mode='json', exclude_none=True)}")
-        return {"data_results": response.model_dump(mode="json", exclude_none=True)}
+        return {"data_results": response.model_dump(mode="json", exclude_none=True), "methods": method}
 
     async def ml_stage(self, state: PipelineState):
         logger.info("Calling planner agent via A2AClient...")
@@ -202,16 +203,17 @@ class SupervisorAgent:
 
             logger.info("DV Promt: " )
             logger.info(dv_prompt)
-            # Build DV request
+            # Build DV request; the routed methods scope which resources it shows
+            message = {
+                "role": "user",
+                "parts": [{"kind": "text", "text": dv_prompt}],
+                "messageId": uuid4().hex,
+            }
+            if state.get("methods"):
+                message["metadata"] = {"methods": state["methods"]}
             req = SendMessageRequest(
                 id=str(uuid4()),
-                params=MessageSendParams(
-                    message={
-                        "role": "user",
-                        "parts": [{"kind": "text", "text": dv_prompt}],
-                        "messageId": uuid4().hex,
-                    }
-                ),
+                params=MessageSendParams(message=message),
             )
 
             client = self.agent_cards["dv_agent"]["client"]